@@ -1,19 +1,27 @@
 import asyncio
 from logging.config import fileConfig
-from sqlalchemy import pool
 from alembic import context
-from sqlalchemy.ext.asyncio import create_async_engine
 
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+# carrega o .env antes de ler a URL
 from app.core.constants import DATABASE_URL
 
-db_url = DATABASE_URL or context.config.get_main_option("sqlalchemy.url")
+ini_url = context.config.get_main_option("sqlalchemy.url")
+if ini_url and ini_url.startswith("driver://"):
+    # placeholder do alembic.ini
+    ini_url = None
+db_url = DATABASE_URL or ini_url
 
 if not db_url:
     raise RuntimeError("DATABASE_URL is not set. Set the DATABASE_URL environment variable or configure sqlalchemy.url in alembic.ini")
+if not DATABASE_URL:
+    # app.db monta o engine da aplicação na importação a partir de DATABASE_URL
+    os.environ["DATABASE_URL"] = db_url
+
+from app.db import build_engine
 import app.models
 from sqlmodel import SQLModel as _SQLModel
 target_metadata = _SQLModel.metadata
@@ -34,7 +42,8 @@ def do_run_migrations(connection):
 
 
 async def run_async_migrations():
-    connectable = create_async_engine(db_url, poolclass=pool.NullPool)
+    # perfil "migration": conexão única sem pool e sem cache de prepared statements (DDL invalida os planos)
+    connectable = build_engine(db_url, role="migration")
     async with connectable.connect() as connection:
         await connection.run_sync(do_run_migrations)
     await connectable.dispose()
@@ -0,0 +1,29 @@
+"""add batch_id to textentry
+
+Revision ID: 4_add_batch_id_to_textentry
+Revises: 3_convert_category_to_varchar
+Create Date: 2025-10-04 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '4_add_batch_id_to_textentry'
+down_revision: Union[str, Sequence[str], None] = '3_convert_category_to_varchar'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add nullable batch_id column (batch imports) and its index."""
+    op.add_column('textentry', sa.Column('batch_id', sa.String(), nullable=True))
+    op.create_index('ix_textentry_batch_id', 'textentry', ['batch_id'])
+
+
+def downgrade() -> None:
+    """Drop batch_id column and its index."""
+    op.drop_index('ix_textentry_batch_id', table_name='textentry')
+    op.drop_column('textentry', 'batch_id')
@@ -0,0 +1,27 @@
+"""add (user_id, created_at, id) index to textentry
+
+Revision ID: 5_add_textentry_history_index
+Revises: 4_add_batch_id_to_textentry
+Create Date: 2025-10-06 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5_add_textentry_history_index'
+down_revision: Union[str, Sequence[str], None] = '4_add_batch_id_to_textentry'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Composite index used by the keyset-paginated history listing."""
+    op.create_index('ix_textentry_user_created_id', 'textentry', ['user_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Drop the history listing index."""
+    op.drop_index('ix_textentry_user_created_id', table_name='textentry')
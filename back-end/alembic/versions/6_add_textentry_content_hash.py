@@ -0,0 +1,29 @@
+"""add content_hash column and (content_hash, created_at) index to textentry
+
+Revision ID: 6_add_textentry_content_hash
+Revises: 5_add_textentry_history_index
+Create Date: 2025-10-08 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '6_add_textentry_content_hash'
+down_revision: Union[str, Sequence[str], None] = '5_add_textentry_history_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add nullable content_hash column (upload deduplication) and its lookup index."""
+    op.add_column('textentry', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_textentry_content_hash_created', 'textentry', ['content_hash', 'created_at'])
+
+
+def downgrade() -> None:
+    """Drop content_hash column and its index."""
+    op.drop_index('ix_textentry_content_hash_created', table_name='textentry')
+    op.drop_column('textentry', 'content_hash')
@@ -0,0 +1,27 @@
+"""add classified_by column to textentry
+
+Revision ID: 7_add_textentry_classified_by
+Revises: 6_add_textentry_content_hash
+Create Date: 2025-10-09 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7_add_textentry_classified_by'
+down_revision: Union[str, Sequence[str], None] = '6_add_textentry_content_hash'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add nullable classified_by column (origin of the category: llm or local)."""
+    op.add_column('textentry', sa.Column('classified_by', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop classified_by column."""
+    op.drop_column('textentry', 'classified_by')
@@ -6,6 +6,22 @@ load_dotenv()
 
 #Database
 DATABASE_URL: str =os.getenv("DATABASE_URL")
+# perfil do engine por papel do processo: api, worker ou migration (ver app/db.py)
+DB_ROLE: str = os.getenv("DB_ROLE", "api").strip().lower()
+_raw_db_echo: str = os.getenv("DB_ECHO", "false").strip()
+DB_ECHO: bool = _raw_db_echo.lower() in ("1", "true", "yes", "y", "on")
+
+
+def _optional_int(name: str) -> int | None:
+	raw = os.getenv(name, "").strip()
+	return int(raw) if raw else None
+
+
+# vazios = padrão do perfil
+DB_POOL_SIZE: int | None = _optional_int("DB_POOL_SIZE")
+DB_MAX_OVERFLOW: int | None = _optional_int("DB_MAX_OVERFLOW")
+DB_POOL_RECYCLE_SECONDS: int | None = _optional_int("DB_POOL_RECYCLE_SECONDS")
+DB_STATEMENT_CACHE_SIZE: int | None = _optional_int("DB_STATEMENT_CACHE_SIZE")
 
 #Security
 SECRET_KEY: str = os.getenv("SECRET_KEY", "your_super_secret_key")
@@ -29,17 +45,126 @@ except Exception:
 	CELERY_AUTOSCALE: tuple[int, int] = (10, 3)
 
 CELERY_CONCURRENCY: int = int(os.getenv("CELERY_CONCURRENCY", "2").strip())
+# um event loop por processo do worker, reaproveitado por todas as tasks (false = asyncio.run por task)
+_raw_worker_persistent_loop: str = os.getenv("WORKER_PERSISTENT_LOOP", "true").strip()
+WORKER_PERSISTENT_LOOP: bool = _raw_worker_persistent_loop.lower() in ("1", "true", "yes", "y", "on")
+# prefork: um e-mail por processo; async: pool de threads do Celery alimentando o loop persistente,
+# com até WORKER_MAX_IN_FLIGHT pipelines simultâneas por processo
+WORKER_MODE: str = os.getenv("WORKER_MODE", "prefork").strip().lower()
+WORKER_MAX_IN_FLIGHT: int = int(os.getenv("WORKER_MAX_IN_FLIGHT", "100").strip())
+# token bucket por usuário na fila bulk (e-mails/s e rajada), cobrado só quando outro usuário tem blocos pendentes;
+# rate 0 desativa. Depois de BULK_MAX_DEFERRALS adiamentos o bloco roda mesmo sem tokens
+BULK_USER_RATE: float = float(os.getenv("BULK_USER_RATE", "20").strip())
+BULK_USER_BURST: int = int(os.getenv("BULK_USER_BURST", "100").strip())
+BULK_MAX_DEFERRALS: int = int(os.getenv("BULK_MAX_DEFERRALS", "10").strip())
+BATCH_CHUNK_SIZE: int = int(os.getenv("BATCH_CHUNK_SIZE", "20").strip())
+BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "10000").strip())
+_raw_write_behind_enabled: str = os.getenv("WRITE_BEHIND_ENABLED", "true").strip()
+WRITE_BEHIND_ENABLED: bool = _raw_write_behind_enabled.lower() in ("1", "true", "yes", "y", "on")
+WRITE_BEHIND_FLUSH_MS: int = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "50").strip())
+WRITE_BEHIND_MAX_ROWS: int = int(os.getenv("WRITE_BEHIND_MAX_ROWS", "500").strip())
+HISTORY_PAGE_SIZE: int = int(os.getenv("HISTORY_PAGE_SIZE", "50").strip())
+HISTORY_MAX_PAGE_SIZE: int = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "200").strip())
+TEXT_PREVIEW_CHARS: int = int(os.getenv("TEXT_PREVIEW_CHARS", "160").strip())
+
+#Uploads
+# arquivos são gravados em blocos de UPLOAD_CHUNK_SIZE bytes; acima de UPLOAD_MAX_BYTES a requisição recebe 413
+UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)).strip())
+UPLOAD_MAX_BYTES: int = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)).strip())
+# envios idênticos (mesmo hash) dentro da janela reaproveitam a task/resultado em vez de reprocessar
+_raw_dedup_enabled: str = os.getenv("DEDUP_ENABLED", "true").strip()
+DEDUP_ENABLED: bool = _raw_dedup_enabled.lower() in ("1", "true", "yes", "y", "on")
+DEDUP_WINDOW_SECONDS: int = int(os.getenv("DEDUP_WINDOW_SECONDS", "3600").strip())
+IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400").strip())
+
+#PDF
+# pdfium (rápido) ou pdfplumber; o pdfplumber também é o fallback quando o pdfium não abre o arquivo
+PDF_BACKEND: str = os.getenv("PDF_BACKEND", "pdfium").strip().lower()
+# a extração para ao juntar PDF_MAX_CHARS caracteres (0 = documento inteiro)
+PDF_MAX_CHARS: int = int(os.getenv("PDF_MAX_CHARS", "50000").strip())
+# documentos com PDF_PARALLEL_MIN_PAGES páginas ou mais são divididos em faixas de PDF_PAGES_PER_TASK páginas
+PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", "2").strip())
+PDF_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32").strip())
+PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "16").strip())
+MAIL_MAX_PDF_ATTACHMENTS: int = int(os.getenv("MAIL_MAX_PDF_ATTACHMENTS", "3").strip())
 
 #NLP
 DEFAULT_SPACY_MODEL: str = os.getenv("DEFAULT_SPACY_MODEL", "pt_core_news_sm")
 NLP_WORKERS: int = int(os.getenv("NLP_WORKERS", "2").strip())
 IA_ASYNC_WORKERS: int = int(os.getenv("IA_ASYNC_WORKERS", "2").strip())
+IA_BACKEND: str = os.getenv("IA_BACKEND", "async").strip().lower()
+IA_MAX_IN_FLIGHT: int = int(os.getenv("IA_MAX_IN_FLIGHT", "64").strip())
+_raw_ia_split_pipeline: str = os.getenv("IA_SPLIT_PIPELINE", "true").strip()
+IA_SPLIT_PIPELINE: bool = _raw_ia_split_pipeline.lower() in ("1", "true", "yes", "y", "on")
+IA_CLASSIFY_MAX_OUTPUT_TOKENS: int = int(os.getenv("IA_CLASSIFY_MAX_OUTPUT_TOKENS", "16").strip())
+IA_DRAFT_PRIORITY: int = int(os.getenv("IA_DRAFT_PRIORITY", "6").strip())
+IA_INPUT_TOKEN_BUDGET: int = int(os.getenv("IA_INPUT_TOKEN_BUDGET", "1500").strip())
+
+#Redis
+REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0").strip()
+_raw_stream_enabled: str = os.getenv("STREAM_ENABLED", "true").strip()
+STREAM_ENABLED: bool = _raw_stream_enabled.lower() in ("1", "true", "yes", "y", "on")
+STREAM_TTL_SECONDS: int = int(os.getenv("STREAM_TTL_SECONDS", "600").strip())
+STREAM_TIMEOUT_SECONDS: float = float(os.getenv("STREAM_TIMEOUT_SECONDS", "60").strip())
+TASK_STATUS_TTL_SECONDS: int = int(os.getenv("TASK_STATUS_TTL_SECONDS", "86400").strip())
+TASK_STATUS_MAX_WAIT_SECONDS: float = float(os.getenv("TASK_STATUS_MAX_WAIT_SECONDS", "30").strip())
+TASK_STATUS_POLL_INTERVAL_SECONDS: float = float(os.getenv("TASK_STATUS_POLL_INTERVAL_SECONDS", "0.5").strip())
+TASK_STATUS_MAX_IDS: int = int(os.getenv("TASK_STATUS_MAX_IDS", "200").strip())
 
 #GenAI
 GENAI_API_KEY: str = os.getenv("GENAI_API_KEY")
 GENAI_MODEL: str = os.getenv("GENAI_MODEL", "gemma-3-27b-it")
 GENAI_MAX_OUTPUT_TOKENS: int = int(os.getenv("GENAI_MAX_OUTPUT_TOKENS", "2056").strip())
 GENAI_TEMPERATURE: float = float(os.getenv("GENAI_TEMPERATURE", "0.4").strip())
+GENAI_HTTP_MAX_CONNECTIONS: int = int(os.getenv("GENAI_HTTP_MAX_CONNECTIONS", "20").strip())
+GENAI_HTTP_MAX_KEEPALIVE: int = int(os.getenv("GENAI_HTTP_MAX_KEEPALIVE", "10").strip())
+GENAI_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("GENAI_HTTP_KEEPALIVE_EXPIRY", "60").strip())
+
+#Classificador local (fast-path antes do LLM)
+_raw_local_classifier_enabled: str = os.getenv("LOCAL_CLASSIFIER_ENABLED", "true").strip()
+LOCAL_CLASSIFIER_ENABLED: bool = _raw_local_classifier_enabled.lower() in ("1", "true", "yes", "y", "on")
+LOCAL_CLASSIFIER_PATH: str = os.getenv("LOCAL_CLASSIFIER_PATH", "").strip()
+LOCAL_CLASSIFIER_THRESHOLD: float = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.9").strip())
+LOCAL_CLASSIFIER_FEATURES: int = int(os.getenv("LOCAL_CLASSIFIER_FEATURES", "262144").strip())
+LOCAL_CLASSIFIER_RELOAD_INTERVAL_SECONDS: int = int(os.getenv("LOCAL_CLASSIFIER_RELOAD_INTERVAL_SECONDS", "30").strip())
+
+#Prompt templates
+PROMPT_VERSION: str = os.getenv("PROMPT_VERSION", "v2").strip()
+PROMPT_DIR: str = os.getenv("PROMPT_DIR", "").strip()
+PROMPT_RELOAD_INTERVAL_SECONDS: int = int(os.getenv("PROMPT_RELOAD_INTERVAL_SECONDS", "30").strip())
+
+#Provider-side context caching (prefixo estático do prompt)
+_raw_ia_context_cache_enabled: str = os.getenv("IA_CONTEXT_CACHE_ENABLED", "false").strip()
+IA_CONTEXT_CACHE_ENABLED: bool = _raw_ia_context_cache_enabled.lower() in ("1", "true", "yes", "y", "on")
+IA_CONTEXT_CACHE_PROVIDER: str = os.getenv("IA_CONTEXT_CACHE_PROVIDER", "genai").strip().lower()
+IA_CONTEXT_CACHE_TTL_SECONDS: int = int(os.getenv("IA_CONTEXT_CACHE_TTL_SECONDS", "3600").strip())
+IA_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS: int = int(os.getenv("IA_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS", "300").strip())
+IA_CONTEXT_CACHE_RETRY_SECONDS: int = int(os.getenv("IA_CONTEXT_CACHE_RETRY_SECONDS", "600").strip())
+
+#IA packing (vários emails por prompt)
+_raw_ia_pack_enabled: str = os.getenv("IA_PACK_ENABLED", "true").strip()
+IA_PACK_ENABLED: bool = _raw_ia_pack_enabled.lower() in ("1", "true", "yes", "y", "on")
+IA_PACK_MAX_ITEMS: int = int(os.getenv("IA_PACK_MAX_ITEMS", "10").strip())
+IA_PACK_TOKENS_PER_ITEM: int = int(os.getenv("IA_PACK_TOKENS_PER_ITEM", "350").strip())
+IA_PACK_MAX_INPUT_CHARS: int = int(os.getenv("IA_PACK_MAX_INPUT_CHARS", "24000").strip())
+
+#IA cache
+_raw_ia_cache_enabled: str = os.getenv("IA_CACHE_ENABLED", "true").strip()
+IA_CACHE_ENABLED: bool = _raw_ia_cache_enabled.lower() in ("1", "true", "yes", "y", "on")
+_raw_ia_cache_use_redis: str = os.getenv("IA_CACHE_USE_REDIS", "true").strip()
+IA_CACHE_USE_REDIS: bool = _raw_ia_cache_use_redis.lower() in ("1", "true", "yes", "y", "on")
+IA_CACHE_MAX_ITEMS: int = int(os.getenv("IA_CACHE_MAX_ITEMS", "1024").strip())
+IA_CACHE_TTL_SECONDS: int = int(os.getenv("IA_CACHE_TTL_SECONDS", "86400").strip())
+
+#User cache
+_raw_user_cache_enabled: str = os.getenv("USER_CACHE_ENABLED", "true").strip()
+USER_CACHE_ENABLED: bool = _raw_user_cache_enabled.lower() in ("1", "true", "yes", "y", "on")
+_raw_user_cache_use_redis: str = os.getenv("USER_CACHE_USE_REDIS", "false").strip()
+USER_CACHE_USE_REDIS: bool = _raw_user_cache_use_redis.lower() in ("1", "true", "yes", "y", "on")
+USER_CACHE_MAX_ITEMS: int = int(os.getenv("USER_CACHE_MAX_ITEMS", "10000").strip())
+USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60").strip())
+# intervalo máximo para um processo notar a invalidação feita por outro (geração no Redis); 0 desativa
+USER_CACHE_SYNC_INTERVAL_MS: int = int(os.getenv("USER_CACHE_SYNC_INTERVAL_MS", "1000").strip())
 
 #CORS
 ALLOWED_ORIGINS: List[str] = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173,http://127.0.0.1:3000,http://127.0.0.1:5173").strip().split(",")
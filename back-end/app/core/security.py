@@ -8,13 +8,11 @@ warnings.filterwarnings(
 )
 
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Query
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 
-from app.db import get_session
-from app.crud import get_user_by_id
-from sqlalchemy.ext.asyncio import AsyncSession
+from app.services import user_cache
 
 warnings.filterwarnings(
     "ignore",
@@ -43,18 +41,29 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
-async def get_current_user(session: AsyncSession = Depends(get_session), token: str = Depends(oauth2_scheme)):
+async def _user_from_token(token: str | None):
     if not SECRET_KEY or not ALGORITHM:
         raise HTTPException(status_code=500, detail="Auth not configured properly")
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str | None = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        user = await get_user_by_id(session, int(user_id))
+        # sessão própria só no cache miss: a conexão volta ao pool antes do corpo da requisição ser lido
+        user = await user_cache.get_identity(int(user_id))
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
         return user
     except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return await _user_from_token(token)
+
+async def get_current_user_stream(token: str | None = Depends(oauth2_scheme_optional), access_token: str | None = Query(None)):
+    # EventSource não envia cabeçalhos: aceita o token também por query string
+    return await _user_from_token(token or access_token)
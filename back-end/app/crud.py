@@ -1,5 +1,7 @@
 from calendar import c
+from datetime import datetime, timezone
 import enum
+from sqlalchemy import Integer, column, delete, func, insert, tuple_, update, values
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
@@ -7,7 +9,10 @@ from app.models import User, TextEntry
 from app.db import async_session
 from sqlmodel import Session
 from app.schemas import TextEntryCreateRequest, UserUpdateRequest
-from app.models import Status
+from app.models import Category, Status
+from app.core.config import get_data_dir
+from app.core.constants import TEXT_PREVIEW_CHARS
+from app.services import user_cache
 
 """
     FUNÇÕES PARA USER
@@ -19,16 +24,23 @@ async def create_user(db: AsyncSession, user: User) -> User:
     await db.refresh(user)
     return user
 
-async def get_users(db: AsyncSession) -> list[User]:
-    result = await db.execute(select(User).options(selectinload(User.texts)))
+async def get_users(db: AsyncSession, with_texts: bool = False) -> list[User]:
+    stmt = select(User)
+    if with_texts:
+        stmt = stmt.options(selectinload(User.texts))
+    result = await db.execute(stmt)
     return result.scalars().all()
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     result = await db.execute(select(User).where(User.email == email))
     return result.scalars().first()
 
-async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
-    result = await db.execute(select(User).options(selectinload(User.texts)).where(User.id == user_id))
+async def get_user_by_id(db: AsyncSession, user_id: int, with_texts: bool = False) -> User | None:
+    # o histórico só é carregado quando o endpoint pede; autenticação usa apenas a linha do usuário
+    stmt = select(User).where(User.id == user_id)
+    if with_texts:
+        stmt = stmt.options(selectinload(User.texts))
+    result = await db.execute(stmt)
     return result.scalars().first()
 
 async def update_current_user(db: AsyncSession, user_update: UserUpdateRequest, current_user: User) -> User | None:
@@ -63,6 +75,7 @@ async def update_current_user(db: AsyncSession, user_update: UserUpdateRequest,
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
     return user
 
 async def delete_user_by_id(db: AsyncSession, user_id: int) -> bool:
@@ -70,41 +83,157 @@ async def delete_user_by_id(db: AsyncSession, user_id: int) -> bool:
     if not user:
         return False
     
-    texts = await get_texts_by_user(db, user_id)
-    for text in texts:
-        await db.delete(text)
-    
+    await db.execute(delete(TextEntry).where(TextEntry.user_id == user_id))
     await db.delete(user)
     await db.commit()
+    await user_cache.invalidate(user_id)
     return True
 
 """
     FUNÇÕES PARA TEXTENTRY
 """
 
-async def create_text_entry(text_entry_req: TextEntryCreateRequest) -> TextEntry:
-    te = TextEntry(
+async def create_text_entry(text_entry_req: TextEntryCreateRequest, session: AsyncSession | None = None) -> int:
+    # INSERT ... RETURNING id: uma ida ao banco, sem refresh
+    stmt = insert(TextEntry).values(
         user_id=text_entry_req.user_id,
         original_text=text_entry_req.original_text or "",
         file_name=text_entry_req.file_name,
-        category="Sem classificação",
+        file_path=str(get_data_dir()),
+        file_size=text_entry_req.file_size,
+        file_content_type=text_entry_req.file_content_type,
+        content_hash=text_entry_req.content_hash,
+        category=Category.SEM_CLASSIFICACAO.value,
         generated_response="",
         status=Status.PROCESSING.value,
+        batch_id=text_entry_req.batch_id,
+        created_at=datetime.now(timezone.utc),
+    ).returning(TextEntry.id)
+    if session is None:
+        async with async_session() as own_session:
+            return await _insert_returning_id(own_session, stmt)
+    return await _insert_returning_id(session, stmt)
+
+async def _insert_returning_id(session: AsyncSession, stmt) -> int:
+    try:
+        entry_id = (await session.execute(stmt)).scalar_one()
+        await session.commit()
+        return entry_id
+    except Exception:
+        await session.rollback()
+        raise
+    
+async def create_text_entries_bulk(text_entry_reqs: list[TextEntryCreateRequest]) -> list[int]:
+    if not text_entry_reqs:
+        return []
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "user_id": req.user_id,
+            "original_text": req.original_text or "",
+            "file_name": req.file_name,
+            "file_path": str(get_data_dir()),
+            "file_size": req.file_size,
+            "file_content_type": req.file_content_type,
+            "content_hash": req.content_hash,
+            "category": Category.SEM_CLASSIFICACAO.value,
+            "generated_response": "",
+            "status": Status.PROCESSING.value,
+            "batch_id": req.batch_id,
+            "created_at": now,
+        }
+        for req in text_entry_reqs
+    ]
+    async with async_session() as session:
+        try:
+            result = await session.execute(
+                insert(TextEntry).returning(TextEntry.id, sort_by_parameter_order=True),
+                rows,
+            )
+            ids = list(result.scalars().all())
+            await session.commit()
+            return ids
+        except Exception:
+            await session.rollback()
+            raise
+
+async def get_recent_result_by_hash(db: AsyncSession, user_id: int, content_hash: str, since: datetime) -> TextEntry | None:
+    """Resultado concluído mais recente do usuário com o mesmo conteúdo, criado a partir de `since`.
+
+    Só do próprio usuário: a resposta sugerida é assinada com o username de quem enviou.
+    """
+    result = await db.execute(
+        select(TextEntry)
+        .where(
+            TextEntry.user_id == user_id,
+            TextEntry.content_hash == content_hash,
+            TextEntry.created_at >= since,
+            TextEntry.status == Status.COMPLETED.value,
+        )
+        .order_by(TextEntry.created_at.desc())
+        .limit(1)
     )
+    return result.scalars().first()
+
+async def update_text_entries_status(text_entry_ids: list[int], status: Status) -> None:
+    if not text_entry_ids:
+        return
     async with async_session() as session:
-        session.add(te)
         try:
+            await session.execute(
+                update(TextEntry).where(TextEntry.id.in_(text_entry_ids)).values(status=status.value)
+            )
             await session.commit()
-            await session.refresh(te)
-            return te
-        except Exception as e:
+        except Exception:
             await session.rollback()
             raise
-    
+
+async def get_batch_progress(db: AsyncSession, user_id: int, batch_id: str) -> dict[str, int]:
+    result = await db.execute(
+        select(TextEntry.status, func.count())
+        .where(TextEntry.user_id == user_id, TextEntry.batch_id == batch_id)
+        .group_by(TextEntry.status)
+    )
+    return {status: count for status, count in result.all()}
+
 async def get_texts_by_user(db: AsyncSession, user_id: int) -> list[TextEntry]:
     result = await db.execute(select(TextEntry).where(TextEntry.user_id == user_id))
     return result.scalars().all()
 
+async def get_text_summaries_by_user(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    after: tuple[datetime, int] | None = None,
+    status: str | None = None,
+    category: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+):
+    """Página do histórico em ordem (created_at, id) decrescente; só as colunas do resumo."""
+    stmt = select(
+        TextEntry.id,
+        TextEntry.status,
+        TextEntry.category,
+        TextEntry.created_at,
+        TextEntry.file_name,
+        TextEntry.batch_id,
+        func.substr(TextEntry.original_text, 1, TEXT_PREVIEW_CHARS).label("preview"),
+    ).where(TextEntry.user_id == user_id)
+    if after is not None:
+        stmt = stmt.where(tuple_(TextEntry.created_at, TextEntry.id) < tuple_(*after))
+    if status:
+        stmt = stmt.where(TextEntry.status == status)
+    if category:
+        stmt = stmt.where(TextEntry.category == category)
+    if created_from is not None:
+        stmt = stmt.where(TextEntry.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(TextEntry.created_at < created_to)
+    stmt = stmt.order_by(TextEntry.created_at.desc(), TextEntry.id.desc()).limit(limit)
+    result = await db.execute(stmt)
+    return result.mappings().all()
+
 async def get_text_entry(db: AsyncSession) -> list[TextEntry]:
     result = await db.execute(select(TextEntry))
     return result.scalars().all()
@@ -127,24 +256,83 @@ async def update_text_entry(db: AsyncSession, text_entry_id: int, **kwargs) -> T
     await db.refresh(text_entry)
     return text_entry
 
-async def update_text_entry_by_id(text_entry_id: int, **kwargs) -> TextEntry | None:
-    async with async_session() as session:
-        result = await session.execute(select(TextEntry).where(TextEntry.id == text_entry_id))
-        text_entry = result.scalars().first()
-        if not text_entry:
-            return None
-        for key, value in kwargs.items():
-            if isinstance(value, enum.Enum):
-                value = value.value
-            setattr(text_entry, key, value)
-        session.add(text_entry)
+def _column_values(kwargs: dict) -> dict:
+    return {key: value.value if isinstance(value, enum.Enum) else value for key, value in kwargs.items()}
+
+async def _execute_update(session: AsyncSession, stmt) -> int:
+    try:
+        result = await session.execute(stmt)
+        await session.commit()
+        return result.rowcount
+    except Exception:
+        await session.rollback()
+        raise
+
+async def update_text_entry_by_id(text_entry_id: int, session: AsyncSession | None = None, **kwargs) -> bool:
+    """UPDATE direto por id (sem SELECT prévio nem refresh); retorna se alguma linha foi alterada."""
+    if not kwargs:
+        return False
+    stmt = update(TextEntry).where(TextEntry.id == text_entry_id).values(**_column_values(kwargs))
+    if session is None:
+        async with async_session() as own_session:
+            return await _execute_update(own_session, stmt) > 0
+    return await _execute_update(session, stmt) > 0
+
+async def update_text_entries(updates: list[dict], session: AsyncSession | None = None) -> None:
+    """Variante em lote: cada dict tem `id` e as colunas a alterar; linhas com as mesmas colunas vão num executemany."""
+    groups: dict[tuple, list[dict]] = {}
+    for row in updates:
+        row = _column_values(row)
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    if not groups:
+        return
+
+    async def _run(s: AsyncSession) -> None:
         try:
-            await session.commit()
-            await session.refresh(text_entry)
-            return text_entry
+            for rows in groups.values():
+                await s.execute(update(TextEntry), rows)
+            await s.commit()
         except Exception:
-            await session.rollback()
+            await s.rollback()
+            raise
+
+    if session is None:
+        async with async_session() as own_session:
+            await _run(own_session)
+    else:
+        await _run(session)
+
+def flush_text_entry_updates_sync(engine_obj, rows: dict[int, dict]) -> int:
+    """Grava várias atualizações numa transação: UPDATE ... FROM (VALUES ...) no Postgres, executemany nos demais."""
+    groups: dict[tuple, list[dict]] = {}
+    for entry_id, fields in rows.items():
+        row = {"id": entry_id, **_column_values(fields)}
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    with Session(engine_obj) as session:
+        try:
+            for key, group_rows in groups.items():
+                if engine_obj.dialect.name == "postgresql":
+                    columns = [name for name in key if name != "id"]
+                    table_columns = TextEntry.__table__.c
+                    data = values(
+                        column("id", Integer),
+                        *(column(name, table_columns[name].type) for name in columns),
+                        name="v",
+                    ).data([tuple(r[name] for name in ("id", *columns)) for r in group_rows])
+                    session.execute(
+                        update(TextEntry)
+                        .where(TextEntry.id == data.c.id)
+                        .values({name: data.c[name] for name in columns})
+                        .execution_options(synchronize_session=False)
+                    )
+                else:
+                    session.execute(update(TextEntry), group_rows)
+            session.commit()
+        except Exception:
+            session.rollback()
             raise
+    return len(rows)
 
 def create_text_entry_sync(engine_obj, text_entry_req: TextEntryCreateRequest) -> TextEntry:
     te = TextEntry(
@@ -1,20 +1,114 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict
+from sqlalchemy import create_engine, pool
+from sqlalchemy.engine import make_url
 from sqlmodel import SQLModel
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncSession,
     async_sessionmaker
 )
-from app.core.constants import DATABASE_URL
+from app.core.constants import (
+    DATABASE_URL,
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
+    DB_ROLE,
+    DB_STATEMENT_CACHE_SIZE,
+    WORKER_MAX_IN_FLIGHT,
+    WORKER_MODE,
+)
+
+# api: muitas requisições concorrentes por processo; worker: poucas sessões simultâneas por processo
+# (uma task por vez, ou um bloco do lote), mantidas entre tasks; migration: conexão única, sem pool
+ENGINE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "api": {"pool_size": 10, "max_overflow": 10, "pool_recycle": 1800, "statement_cache_size": 256},
+    "worker": {"pool_size": 5, "max_overflow": 5, "pool_recycle": 1800, "statement_cache_size": 256},
+    "migration": {"pool_size": None, "max_overflow": None, "pool_recycle": -1, "statement_cache_size": 0},
+}
+
+
+def engine_profile(role: str = DB_ROLE) -> Dict[str, Any]:
+    if role not in ENGINE_PROFILES:
+        raise ValueError(f"DB_ROLE inválido: {role!r} (use {', '.join(ENGINE_PROFILES)})")
+    profile = dict(ENGINE_PROFILES[role])
+    if role == "worker" and WORKER_MODE == "async":
+        # até WORKER_MAX_IN_FLIGHT pipelines por processo; cada uma só segura conexão nas transações curtas
+        # (INSERT, categoria), então ~1 conexão para cada 5 pipelines cobre os picos sem esgotar o Postgres
+        profile["pool_size"] = max(profile["pool_size"], WORKER_MAX_IN_FLIGHT // 10)
+        profile["max_overflow"] = max(profile["max_overflow"], WORKER_MAX_IN_FLIGHT // 10)
+    overrides = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+    }
+    if role != "migration":
+        profile.update({k: v for k, v in overrides.items() if v is not None})
+    return profile
+
+
+def engine_options(url: str = DATABASE_URL, role: str = DB_ROLE) -> Dict[str, Any]:
+    """Argumentos de `create_async_engine` para o papel do processo (echo só com DB_ECHO=true)."""
+    profile = engine_profile(role)
+    options: Dict[str, Any] = {"echo": DB_ECHO, "pool_pre_ping": True}
+    if profile["pool_size"] is None:
+        options["poolclass"] = pool.NullPool
+    else:
+        options.update(
+            pool_size=profile["pool_size"],
+            max_overflow=profile["max_overflow"],
+            pool_recycle=profile["pool_recycle"],
+        )
+    if make_url(url).drivername == "postgresql+asyncpg":
+        # cache de prepared statements do asyncpg (0 desativa, ex.: atrás de pgbouncer em modo transaction)
+        cache_size = profile["statement_cache_size"]
+        options["connect_args"] = {"statement_cache_size": cache_size, "prepared_statement_cache_size": cache_size}
+    return options
+
+
+def build_engine(url: str = DATABASE_URL, role: str = DB_ROLE):
+    return create_async_engine(url, **engine_options(url, role))
+
 
-engine = create_async_engine(DATABASE_URL, echo=True, pool_pre_ping=True)
+engine = build_engine()
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# drivers síncronos equivalentes, usados por threads fora do event loop (ex.: write-behind do worker)
+_SYNC_DRIVERS = {"postgresql+asyncpg": "postgresql+psycopg2", "sqlite+aiosqlite": "sqlite"}
+
+
+def sync_database_url(url: str = DATABASE_URL) -> str:
+    parsed = make_url(url)
+    driver = _SYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def create_sync_engine(pool_size: int = 1, max_overflow: int = 1):
+    return create_engine(
+        sync_database_url(),
+        echo=DB_ECHO,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=engine_profile()["pool_recycle"],
+        pool_pre_ping=True,
+    )
+
+
+def reset_pool_after_fork() -> None:
+    # processos filhos (Celery prefork) não podem usar os sockets abertos pelo pai;
+    # close=False descarta as referências sem fechar as conexões do pai
+    engine.sync_engine.dispose(close=False)
+
+
+def pool_status() -> Dict[str, Any]:
+    return {"role": DB_ROLE, "echo": DB_ECHO, "pool": engine.pool.status()}
+
 async def init_db() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 import enum
 from typing import List, Optional
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String
 from sqlmodel import Relationship, SQLModel, Field
 
 from app.core.config import get_data_dir
@@ -15,6 +15,11 @@ class Status(str, enum.Enum):
   PROCESSING = "Processando"
   COMPLETED = "Concluído"
   FAILED = "Falhou"
+
+class ClassifiedBy(str, enum.Enum):
+  LLM = "llm"
+  LOCAL = "local"
+
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str
@@ -27,6 +32,12 @@ class User(SQLModel, table=True):
     texts: List["TextEntry"] = Relationship(back_populates="user")
         
 class TextEntry(SQLModel, table=True):
+    # listagem paginada por usuário em ordem (created_at, id) decrescente; resultado recente por hash do conteúdo
+    __table_args__ = (
+        Index("ix_textentry_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_textentry_content_hash_created", "content_hash", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     original_text: str
@@ -39,6 +50,12 @@ class TextEntry(SQLModel, table=True):
     file_content_type: Optional[str] = Field(default=None, sa_column=Column(String))
     file_size: Optional[int] = Field(default=None, sa_column=Column(Integer))
 
+    batch_id: Optional[str] = Field(default=None, sa_column=Column(String, nullable=True, index=True))
+    # SHA-256 do arquivo enviado ou do texto normalizado (deduplicação na ingestão)
+    content_hash: Optional[str] = Field(default=None, sa_column=Column(String(64), nullable=True))
+    # origem da categoria (LLM ou classificador local); o treino do classificador local ignora os próprios rótulos
+    classified_by: Optional[str] = Field(default=None, sa_column=Column(String(16), nullable=True))
+
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
         sa_column=Column(DateTime(timezone=True), nullable=False)
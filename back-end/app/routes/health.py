@@ -3,7 +3,9 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_session
+from app.db import get_session, pool_status
+from app.services import ia as ia_service
+from app.services import local_classifier, user_cache
 
 router = APIRouter(prefix="/health")
 
@@ -17,6 +19,18 @@ async def health_db(session: AsyncSession = Depends(get_session)):
 async def health_ping():
   return {"ping": "pong!"}
 
+@router.get("/metrics")
+async def health_metrics():
+  return {
+    "ia_cache": ia_service.cache_stats(),
+    "genai_client": ia_service.client_stats(),
+    "ia_packing": ia_service.pack_stats(),
+    "ia_context_cache": ia_service.context_cache_stats(),
+    "local_classifier": local_classifier.stats(),
+    "user_cache": user_cache.stats(),
+    "db": pool_status(),
+  }
+
 @router.get("/")
 async def health_check():
   return {"status": "ok"}
\ No newline at end of file
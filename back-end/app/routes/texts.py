@@ -1,47 +1,385 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form, Request
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta, timezone
 import os
 from pathlib import Path
 import uuid
 
 from app.db import get_session
-from app.core.security import get_current_user
-from app.schemas import TextEntryResponse
-from app.crud import get_texts_by_user, get_text_by_id, delete_text_entry_by_id
+from app.core.security import get_current_user, get_current_user_stream
+from celery import group
+from python_multipart.exceptions import MultipartParseError
+
+from app.schemas import (
+    BatchCreateResponse,
+    BatchStatusResponse,
+    ProcessResultResponse,
+    TaskStatusResponse,
+    TextEntryCreateRequest,
+    TextEntryPage,
+    TextEntryResponse,
+    TextEntrySummary,
+)
+from app.crud import (
+    create_text_entries_bulk,
+    create_text_entry,
+    delete_text_entry_by_id,
+    get_batch_progress,
+    get_recent_result_by_hash,
+    get_text_by_id,
+    get_text_summaries_by_user,
+    get_texts_by_user,
+    update_text_entries_status,
+    update_text_entry_by_id,
+)
 from app.core.config import get_data_dir, settings
-from app.services.tasks import process_pipeline_task
+from app.core.constants import (
+    BATCH_CHUNK_SIZE,
+    BATCH_MAX_ITEMS,
+    DEDUP_ENABLED,
+    DEDUP_WINDOW_SECONDS,
+    HISTORY_MAX_PAGE_SIZE,
+    HISTORY_PAGE_SIZE,
+    STREAM_ENABLED,
+    STREAM_TIMEOUT_SECONDS,
+    TASK_STATUS_MAX_IDS,
+    TASK_STATUS_MAX_WAIT_SECONDS,
+    UPLOAD_MAX_BYTES,
+)
+from app.models import Category, Status
+from app.services import stream as stream_service
+from app.services import dedup, fairness, task_status, upload_stream
+from app.services.upload_stream import SavedUpload
+from app.services.tasks import process_batch_task, process_pipeline_task
 
 
 router = APIRouter(prefix="/texts")
 
-@router.post("/processar_email")
-async def processar_email(request: Request, file: UploadFile | None = File(None), text: str | None = Form(None), session=Depends(get_session), current_user=Depends(get_current_user)):
+# corpo do formulário sem o arquivo: campo de texto e delimitadores do multipart
+_FORM_OVERHEAD_BYTES = upload_stream.MAX_FIELD_BYTES + 64 * 1024
+
+_EMAIL_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}, "text": {"type": "string"}},
+                }
+            }
+        },
+    }
+}
+
+_BATCH_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                        "texts": {"type": "array", "items": {"type": "string"}},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+async def _read_form(request: Request, file_field: str, max_files: int) -> upload_stream.StreamedForm:
+    """Arquivos gravados em disco conforme chegam; memória por upload limitada a UPLOAD_CHUNK_SIZE."""
     try:
-        content_type = request.headers.get("content-type")
-    except Exception:
-        pass
+        return await upload_stream.read_form(
+            request, get_data_dir(), file_field=file_field, max_file_bytes=UPLOAD_MAX_BYTES, max_files=max_files
+        )
+    except upload_stream.UploadRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+    except MultipartParseError:
+        raise HTTPException(status_code=400, detail="Multipart inválido")
+
+
+def _reject_oversized(request: Request, max_bytes: int) -> None:
+    try:
+        upload_stream.reject_oversized(request.headers.get("content-length"), max_bytes)
+    except upload_stream.UploadRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+
+async def _attach_existing(keys: list[tuple[str, int]], task_id: str, user_id: int) -> dict | None:
+    # a reserva grava o status "queued" no mesmo script: sem status, a task anterior expirou
+    existing = await dedup.claim(keys, task_id, user_id)
+    if existing is None or existing == task_id:
+        return None
+    data = (await task_status.get_many([existing]))[existing]
+    if data is None or data["status"] == Status.FAILED.value or data.get("user_id") != user_id:
+        await dedup.reassign(keys, task_id, user_id)
+        return None
+    return {"task_id": existing, "status": data["status"], "deduplicated": True}
+
+
+async def _reuse_recent_result(session, task_id: str, user_id: int, content_hash: str, upload: SavedUpload | None) -> dict | None:
+    # mesmo conteúdo já concluído pelo usuário na janela, mas sem chave no Redis (expirada ou Redis reiniciado):
+    # copia o resultado para um registro novo
+    since = datetime.now(timezone.utc) - timedelta(seconds=DEDUP_WINDOW_SECONDS)
+    recent = await get_recent_result_by_hash(session, user_id, content_hash, since)
+    if recent is None:
+        return None
+    entry_id = await create_text_entry(
+        TextEntryCreateRequest(
+            user_id=user_id,
+            original_text=recent.original_text,
+            file_name=os.path.basename(upload.path) if upload else None,
+            file_size=upload.size if upload else None,
+            file_content_type=upload.content_type if upload else None,
+            content_hash=content_hash,
+        ),
+        session=session,
+    )
+    await update_text_entry_by_id(
+        entry_id,
+        session=session,
+        category=recent.category,
+        classified_by=recent.classified_by,
+        generated_response=recent.generated_response,
+        status=Status.COMPLETED.value,
+    )
+    await task_status.record(
+        task_id,
+        status=Status.COMPLETED.value,
+        user_id=user_id,
+        text_entry_id=entry_id,
+        category=recent.category,
+        generated_response=recent.generated_response,
+    )
+    return {"task_id": task_id, "status": Status.COMPLETED.value, "deduplicated": True}
+
+
+@router.post("/processar_email", openapi_extra=_EMAIL_FORM)
+async def processar_email(request: Request, session=Depends(get_session), current_user=Depends(get_current_user)):
+    # arquivo maior que o limite: recusa pelo Content-Length, antes de receber o corpo
+    _reject_oversized(request, UPLOAD_MAX_BYTES + _FORM_OVERHEAD_BYTES)
+
+    # id gerado antes do envio para o status "queued" nunca sobrescrever o do worker
+    task_id = uuid.uuid4().hex
+    idempotency_key = request.headers.get("Idempotency-Key")
+    claim_keys = [dedup.idempotency_key(current_user.id, idempotency_key)] if DEDUP_ENABLED and idempotency_key else []
+    # reenvio com a mesma chave: responde antes de receber o arquivo
+    if claim_keys and (attached := await _attach_existing(claim_keys, task_id, current_user.id)):
+        return attached
+
     try:
-        if file is None and not text:
+        form = await _read_form(request, "file", max_files=1)
+        upload = form.first_file("file")
+        text = form.first_field("text")
+        if upload is None and not text:
             raise HTTPException(status_code=400, detail="Enviar 'text' ou 'file'")
-    except Exception:
+        return await _enqueue_email(session, task_id, current_user, upload, text, claim_keys)
+    except BaseException:
+        # a task reservada não vai existir: libera as chaves para a próxima tentativa não se anexar a ela
+        await task_status.record(task_id, status=Status.FAILED.value, user_id=current_user.id)
         raise
 
-    if file:
-        data_dir: Path = get_data_dir()
-        suffix = os.path.splitext(file.filename or "")[1] or ""
-        unique_name = f"upload-{uuid.uuid4().hex}{suffix}"
-        tmp_path = data_dir / unique_name
-        content = await file.read()
-        tmp_path.write_bytes(content)
-        process_kwargs = {"file_path": str(tmp_path), "user_id": current_user.id, "username": getattr(current_user, 'username', None)}
+
+async def _enqueue_email(session, task_id: str, current_user, upload: SavedUpload | None, text: str | None, claim_keys: list[tuple[str, int]]) -> dict:
+    if upload is not None:
+        content_hash = upload.sha256
+        process_kwargs = {
+            "file_path": str(upload.path),
+            "user_id": current_user.id,
+            "username": getattr(current_user, 'username', None),
+            "file_size": upload.size,
+            "file_content_type": upload.content_type,
+            "content_hash": content_hash,
+        }
     else:
-        process_kwargs = {"text": text, "user_id": current_user.id, "username": getattr(current_user, 'username', None)}
+        content_hash = dedup.text_hash(text)
+        process_kwargs = {"text": text, "user_id": current_user.id, "username": getattr(current_user, 'username', None), "content_hash": content_hash}
 
+    if DEDUP_ENABLED:
+        attached = await _attach_existing([dedup.content_key(current_user.id, content_hash), *claim_keys], task_id, current_user.id)
+        if attached is None:
+            attached = await _reuse_recent_result(session, task_id, current_user.id, content_hash, upload)
+        if attached is not None:
+            if upload is not None:
+                upload.path.unlink(missing_ok=True)
+            return attached
+
+    await task_status.record(task_id, status=task_status.QUEUED, user_id=current_user.id)
     try:
         task_obj = process_pipeline_task
-        async_result = task_obj.apply_async(kwargs=process_kwargs)
+        async_result = task_obj.apply_async(kwargs=process_kwargs, task_id=task_id)
         return {"task_id": getattr(async_result, "id", None), "status": "queued"}
     except Exception:
+        if upload is not None:
+            upload.path.unlink(missing_ok=True)
+        raise HTTPException(status_code=503, detail="Serviço de processamento indisponível; tente novamente mais tarde")
+
+
+@router.post("/processar_lote", response_model=BatchCreateResponse, openapi_extra=_BATCH_FORM)
+async def processar_lote(request: Request, current_user=Depends(get_current_user)):
+    _reject_oversized(request, BATCH_MAX_ITEMS * UPLOAD_MAX_BYTES + _FORM_OVERHEAD_BYTES)
+    form = await _read_form(request, "files", max_files=BATCH_MAX_ITEMS)
+    uploads = form.files.get("files", [])
+    texts = [t for t in form.fields.get("texts", []) if t and t.strip()]
+    total = len(uploads) + len(texts)
+    if total == 0 or total > BATCH_MAX_ITEMS:
+        form.discard()
+    if total == 0:
+        raise HTTPException(status_code=400, detail="Enviar 'texts' ou 'files'")
+    if total > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Lote excede o máximo de {BATCH_MAX_ITEMS} itens")
+
+    batch_id = uuid.uuid4().hex
+    username = getattr(current_user, 'username', None)
+
+    entry_reqs = [
+        TextEntryCreateRequest(
+            user_id=current_user.id,
+            file_name=os.path.basename(upload.path),
+            file_size=upload.size,
+            file_content_type=upload.content_type,
+            content_hash=upload.sha256,
+            batch_id=batch_id,
+        )
+        for upload in uploads
+    ] + [
+        TextEntryCreateRequest(user_id=current_user.id, original_text=t, content_hash=dedup.text_hash(t), batch_id=batch_id)
+        for t in texts
+    ]
+    try:
+        entry_ids = await create_text_entries_bulk(entry_reqs)
+    except Exception:
+        # sem registros, nenhuma task vai ler (nem apagar) os arquivos gravados
+        form.discard()
+        raise HTTPException(status_code=503, detail="Serviço de processamento indisponível; tente novamente mais tarde")
+
+    items = [
+        {
+            "text_entry_id": entry_id,
+            "file_path": str(upload.path),
+            "file_content_type": upload.content_type,
+            "user_id": current_user.id,
+            "username": username,
+        }
+        for entry_id, upload in zip(entry_ids, uploads)
+    ] + [
+        {"text_entry_id": entry_id, "text": t, "user_id": current_user.id, "username": username}
+        for entry_id, t in zip(entry_ids[len(uploads):], texts)
+    ]
+    chunk_size = max(1, BATCH_CHUNK_SIZE)
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    await fairness.mark_enqueued(current_user.id, len(chunks))
+    try:
+        group_result = group(process_batch_task.s(chunk) for chunk in chunks).apply_async()
+    except Exception:
+        await fairness.mark_done(current_user.id, len(chunks))
+        form.discard()
+        await update_text_entries_status(entry_ids, Status.FAILED)
         raise HTTPException(status_code=503, detail="Serviço de processamento indisponível; tente novamente mais tarde")
+    return BatchCreateResponse(batch_id=batch_id, task_id=getattr(group_result, "id", None), total=total)
+
+
+@router.get("/lotes/{batch_id}", response_model=BatchStatusResponse)
+async def status_lote(batch_id: str, session=Depends(get_session), current_user=Depends(get_current_user)):
+    counts = await get_batch_progress(session, current_user.id, batch_id)
+    total = sum(counts.values())
+    if total == 0:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    processing = counts.get(Status.PROCESSING.value, 0)
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        total=total,
+        processing=processing,
+        completed=counts.get(Status.COMPLETED.value, 0),
+        failed=counts.get(Status.FAILED.value, 0),
+        done=processing == 0,
+    )
+
+
+def _task_response(task_id: str, data: dict) -> TaskStatusResponse:
+    result = None
+    if data.get("category"):
+        result = ProcessResultResponse(
+            category=data["category"],
+            confidence=data.get("confidence"),
+            generated_response=data.get("generated_response"),
+        )
+    return TaskStatusResponse(task_id=task_id, status=data["status"], text_entry_id=data.get("text_entry_id"), result=result)
+
+
+def _wait_seconds(wait: float) -> float:
+    return min(max(wait, 0.0), TASK_STATUS_MAX_WAIT_SECONDS)
+
+
+@router.get("/tasks", response_model=list[TaskStatusResponse])
+async def status_tasks(ids: list[str] = Query(...), wait: float = 0, current_user=Depends(get_current_user)):
+    # aceita ?ids=a&ids=b e ?ids=a,b
+    task_ids = list(dict.fromkeys(t.strip() for raw in ids for t in raw.split(",") if t.strip()))
+    if not task_ids:
+        raise HTTPException(status_code=400, detail="Enviar 'ids'")
+    if len(task_ids) > TASK_STATUS_MAX_IDS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {TASK_STATUS_MAX_IDS} tasks por consulta")
+    found = await task_status.wait_many(task_ids, timeout=_wait_seconds(wait))
+    return [
+        _task_response(task_id, data)
+        for task_id, data in found.items()
+        if data is not None and data.get("user_id") == current_user.id
+    ]
+
+
+@router.get("/tasks/{task_id}", response_model=TaskStatusResponse)
+async def status_task(task_id: str, wait: float = 0, current_user=Depends(get_current_user)):
+    found = await task_status.wait_many([task_id], timeout=_wait_seconds(wait))
+    data = found.get(task_id)
+    if data is None or data.get("user_id") != current_user.id:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return _task_response(task_id, data)
+
+
+def _sse(event: dict) -> str:
+    return f"id: {event.get('seq', 0)}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+@router.get("/tasks/{task_id}/stream")
+async def stream_task(task_id: str, request: Request, current_user=Depends(get_current_user_stream)):
+    """Server-Sent Events com os chunks da resposta conforme o worker os recebe do LLM."""
+    if not STREAM_ENABLED:
+        raise HTTPException(status_code=404, detail="Streaming disabled")
+    try:
+        after = int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        after = 0
+
+    async def events():
+        owner_checked = False
+        try:
+            # o histórico é relido desde o início para validar o dono no evento "start"
+            async for event in stream_service.subscribe(task_id, timeout=STREAM_TIMEOUT_SECONDS):
+                if event["type"] == "start":
+                    if event.get("user_id") != current_user.id:
+                        yield _sse({"type": "error", "detail": "Task not found"})
+                        return
+                    owner_checked = True
+                if event["type"] != "timeout" and (not owner_checked or event.get("seq", 0) <= after):
+                    continue
+                yield _sse(event)
+                if await request.is_disconnected():
+                    return
+        except Exception:
+            yield _sse({"type": "error", "detail": "Streaming indisponível"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/", response_model=list[TextEntryResponse])
@@ -49,6 +387,58 @@ async def list_texts(session=Depends(get_session), current_user=Depends(get_curr
     items = await get_texts_by_user(session, current_user.id)
     return items
 
+
+def _encode_cursor(created_at: datetime, text_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), text_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, text_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(text_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/historico", response_model=TextEntryPage)
+async def list_text_history(
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1),
+    cursor: str | None = None,
+    status: Status | None = None,
+    category: Category | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    session=Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    """Histórico paginado por cursor (keyset em created_at, id), com resumo em vez do texto completo."""
+    limit = min(limit, HISTORY_MAX_PAGE_SIZE)
+    rows = await get_text_summaries_by_user(
+        session,
+        current_user.id,
+        limit=limit + 1,
+        after=_decode_cursor(cursor) if cursor else None,
+        status=status.value if status else None,
+        category=category.value if category else None,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return TextEntryPage(items=[TextEntrySummary.model_validate(dict(r)) for r in rows], next_cursor=next_cursor)
+
+
+@router.get("/{text_id}", response_model=TextEntryResponse)
+async def get_text(text_id: int, session=Depends(get_session), current_user=Depends(get_current_user)):
+    text_entry = await get_text_by_id(session, text_id)
+    if not text_entry or text_entry.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Text entry not found")
+    return text_entry
+
 @router.delete("/{text_id}", status_code=204)
 async def delete_text(text_id: int, session=Depends(get_session), current_user=Depends(get_current_user)):
 
@@ -1,22 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.db import get_session
-from app.schemas import UserResponse, UserUpdateRequest
+from app.schemas import UserPublicResponse, UserResponse, UserUpdateRequest
 from app.crud import delete_user_by_id, get_user_by_id, get_users, update_current_user
 from app.core.security import get_current_user
 
 router = APIRouter(prefix="/users")
 
 
-@router.get("/", response_model=list[UserResponse])
+@router.get("/", response_model=list[UserPublicResponse])
 async def get_users_list(session=Depends(get_session), current_user=Depends(get_current_user)):
     return await get_users(session)
 
-@router.get("/me", response_model=UserResponse)
-async def get_current_user_info(session=Depends(get_session), current_user=Depends(get_current_user)):
-    return await get_user_by_id(session, current_user.id)
+@router.get("/me", response_model=UserResponse, response_model_exclude_none=True)
+async def get_current_user_info(include_texts: bool = False, session=Depends(get_session), current_user=Depends(get_current_user)):
+    # o histórico completo é opt-in; a listagem paginada fica em /texts/historico
+    if include_texts:
+        return await get_user_by_id(session, current_user.id, with_texts=True)
+    return UserResponse(id=current_user.id, username=current_user.username, email=current_user.email)
 
-@router.put("/me", response_model=UserResponse)
+@router.put("/me", response_model=UserPublicResponse)
 async def update_current_user_info(
     user_update: UserUpdateRequest,
     session=Depends(get_session), 
@@ -16,18 +16,24 @@ class UserUpdateRequest(BaseModel):
     current_password: str | None = None
     new_password: str | None = None
 
-class UserResponse(BaseModel):
+class UserPublicResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
-    
+
     id: int
     username: str
     email: str
-    texts: list["TextEntryResponse"]
+
+class UserResponse(UserPublicResponse):
+    texts: list["TextEntryResponse"] | None = None
     
 class TextEntryCreateRequest(BaseModel):
     user_id: int
     original_text: str | None = None
     file_name: str | None = None
+    file_size: int | None = None
+    file_content_type: str | None = None
+    content_hash: str | None = None
+    batch_id: str | None = None
     
 class TextEntryResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -40,6 +46,36 @@ class TextEntryResponse(BaseModel):
     created_at: datetime
     generated_response: str | None = None
     file_name: str | None = None
+    batch_id: str | None = None
+
+class TextEntrySummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    status: str
+    category: str | None = None
+    created_at: datetime
+    file_name: str | None = None
+    batch_id: str | None = None
+    preview: str | None = None
+
+class TextEntryPage(BaseModel):
+    items: list[TextEntrySummary]
+    next_cursor: str | None = None
+
+class BatchCreateResponse(BaseModel):
+    batch_id: str
+    task_id: str | None = None
+    total: int
+    status: str = "queued"
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    total: int
+    processing: int
+    completed: int
+    failed: int
+    done: bool
     
 class TokenResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -59,4 +95,5 @@ class TaskStatusResponse(BaseModel):
 
     task_id: str
     status: str
+    text_entry_id: int | None = None
     result: ProcessResultResponse | None = None
\ No newline at end of file
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Coroutine, Dict
+
+from app.core.constants import WORKER_MAX_IN_FLIGHT, WORKER_PERSISTENT_LOOP
+
+
+class AsyncRuntime:
+    """Event loop de longa duração por processo, rodando numa thread dedicada.
+
+    As tasks do Celery submetem corrotinas com `run()`; pool do banco, clientes HTTP/Redis e caches ligados ao
+    loop continuam válidos de uma task para a outra, em vez de serem recriados a cada `asyncio.run`. Várias threads
+    (pool `threads` do Celery) podem submeter ao mesmo loop; no máximo `max_in_flight` corrotinas rodam ao mesmo tempo.
+    """
+
+    def __init__(self, max_in_flight: int = WORKER_MAX_IN_FLIGHT):
+        self.max_in_flight = max(1, max_in_flight)
+        self._init_state()
+
+    def _init_state(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        # criado e usado só na thread do loop
+        self._semaphore: asyncio.Semaphore | None = None
+        self._in_flight = 0
+        self._stats = {"loops_created": 0, "runs": 0, "peak_in_flight": 0}
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop | None:
+        return self._loop
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _serve() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=_serve, name="worker-event-loop", daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            self._semaphore = None
+            self._stats["loops_created"] += 1
+            return loop
+
+    async def _bounded(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._semaphore:
+            self._in_flight += 1
+            if self._in_flight > self._stats["peak_in_flight"]:
+                self._stats["peak_in_flight"] = self._in_flight
+            try:
+                return await coro
+            finally:
+                self._in_flight -= 1
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        loop = self.start()
+        with self._lock:
+            self._stats["runs"] += 1
+        return asyncio.run_coroutine_threadsafe(self._bounded(coro), loop)
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: float | None = None) -> Any:
+        if self._thread is not None and threading.current_thread() is self._thread:
+            raise RuntimeError("AsyncRuntime.run() chamado de dentro do próprio event loop")
+        return self.submit(coro).result(timeout)
+
+    def stop(self, cleanup: Awaitable | None = None, timeout: float = 10) -> None:
+        """Executa `cleanup` (ex.: dispose do engine) no loop e encerra a thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = self._pid = None
+        if loop is None or not thread.is_alive():
+            if cleanup is not None and hasattr(cleanup, "close"):
+                cleanup.close()
+            return
+        try:
+            if cleanup is not None:
+                asyncio.run_coroutine_threadsafe(cleanup, loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+
+    def _after_fork(self) -> None:
+        # a thread do loop não existe no processo filho; um novo loop é criado sob demanda
+        self._init_state()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["running"] = self._loop is not None
+        stats["in_flight"] = self._in_flight
+        stats["max_in_flight"] = self.max_in_flight
+        stats["enabled"] = WORKER_PERSISTENT_LOOP
+        return stats
+
+
+runtime = AsyncRuntime()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=runtime._after_fork)
+
+
+async def _run_then_dispose(coro: Coroutine[Any, Any, Any]) -> Any:
+    from app.db import engine
+
+    try:
+        return await coro
+    finally:
+        # conexões do asyncpg ficam presas ao loop que as abriu, e este loop morre com a task
+        await engine.dispose()
+
+
+def run(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Executa a corrotina de uma task no loop persistente do processo (ou via `asyncio.run`, se desativado)."""
+    if WORKER_PERSISTENT_LOOP:
+        return runtime.run(coro)
+    return asyncio.run(_run_then_dispose(coro))
@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Any
+
+from cachetools import TTLCache
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str | None) -> str:
+    if not text:
+        return ""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def content_key(*parts: Any) -> str:
+    raw = json.dumps(parts, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TwoTierCache:
+    """LRU em memória (por processo) com TTL, opcionalmente apoiado por um tier Redis compartilhado.
+
+    Com `invalidation_url`, `delete()` incrementa uma geração no Redis e cada processo, ao consultar o cache (no
+    máximo a cada `sync_interval_seconds`), descarta o LRU local quando a geração mudou.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_items: int,
+        ttl_seconds: int,
+        redis_url: str | None = None,
+        invalidation_url: str | None = None,
+        sync_interval_seconds: float = 1.0,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.redis_url = redis_url
+        self.invalidation_url = invalidation_url
+        self.sync_interval_seconds = sync_interval_seconds
+        self._local: TTLCache = TTLCache(maxsize=max(1, max_items), ttl=max(1, ttl_seconds))
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_loop = None
+        self._generation: bytes | None = None
+        self._synced_at = 0.0
+        self._stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "sets": 0, "redis_errors": 0, "invalidations": 0}
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _client(self):
+        # conexão usada pelo tier Redis e/ou pela geração de invalidação
+        url = self.redis_url or self.invalidation_url
+        if not url:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            import redis.asyncio as redis_asyncio
+
+            self._redis = redis_asyncio.from_url(
+                url,
+                socket_connect_timeout=0.5,
+                socket_timeout=0.5,
+            )
+            self._redis_loop = loop
+        return self._redis
+
+    def _get_redis(self):
+        return self._client() if self.redis_url else None
+
+    async def _sync_generation(self) -> None:
+        if not self.invalidation_url:
+            return
+        now = time.monotonic()
+        if now - self._synced_at < self.sync_interval_seconds:
+            return
+        self._synced_at = now
+        try:
+            generation = await self._client().get(f"{self.namespace}:generation")
+        except Exception:
+            # sem Redis o LRU local continua valendo até o TTL
+            self._incr("redis_errors")
+            return
+        if generation != self._generation:
+            if self._generation is not None or generation is not None:
+                self.clear_local()
+                self._incr("invalidations")
+            self._generation = generation
+
+    def _incr(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get_local(self, key: str) -> Any | None:
+        with self._lock:
+            return self._local.get(key)
+
+    def set_local(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._local[key] = value
+
+    async def get(self, key: str) -> Any | None:
+        await self._sync_generation()
+        value = self.get_local(key)
+        if value is not None:
+            self._incr("local_hits")
+            return value
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = await client.get(self._redis_key(key))
+            except Exception:
+                raw = None
+                self._incr("redis_errors")
+            if raw is not None:
+                try:
+                    value = json.loads(raw)
+                except Exception:
+                    value = None
+                if value is not None:
+                    self.set_local(key, value)
+                    self._incr("redis_hits")
+                    return value
+
+        self._incr("misses")
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        self.set_local(key, value)
+        self._incr("sets")
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                payload = json.dumps(value, ensure_ascii=False, default=str)
+                await client.set(self._redis_key(key), payload, ex=self.ttl_seconds)
+            except Exception:
+                self._incr("redis_errors")
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._local.pop(key, None)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                await client.delete(self._redis_key(key))
+            except Exception:
+                self._incr("redis_errors")
+        if self.invalidation_url:
+            try:
+                # os outros processos descartam o LRU local na próxima consulta
+                await self._client().incr(f"{self.namespace}:generation")
+            except Exception:
+                self._incr("redis_errors")
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["local_size"] = len(self._local)
+            stats["local_max_size"] = self._local.maxsize
+        hits = stats["local_hits"] + stats["redis_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
@@ -1,7 +1,8 @@
 from celery import Celery
+from kombu import Queue
 import os
 from pathlib import Path
-from app.core.constants import CELERY_BROKER_URL, CELERY_RESULT_BACKEND
+from app.core.constants import CELERY_BROKER_URL, CELERY_RESULT_BACKEND, WORKER_MAX_IN_FLIGHT, WORKER_MODE
 
 DOTENV_PATH = Path(__file__).resolve().parents[2] / ".env"
 if DOTENV_PATH.exists():
@@ -22,12 +23,35 @@ if DOTENV_PATH.exists():
 
 celery = Celery("autou", broker=CELERY_BROKER_URL, backend=CELERY_RESULT_BACKEND)
 
+# envios individuais, redação de respostas e lotes em filas separadas: workers dedicados a `interactive`
+# (e `drafting`) não são ocupados por importações grandes
+QUEUE_INTERACTIVE = "interactive"
+QUEUE_DRAFTING = "drafting"
+QUEUE_BULK = "bulk"
+
 celery.conf.update(
     task_serializer="json",
     result_serializer="json",
     accept_content=["json"],
     task_track_started=True,
     worker_max_tasks_per_child=100,
+    # prioridades no Redis (0 = mais alta); a redação de respostas usa IA_DRAFT_PRIORITY
+    broker_transport_options={"priority_steps": list(range(10)), "queue_order_strategy": "priority"},
+    task_default_priority=3,
+    task_queues=(Queue(QUEUE_INTERACTIVE), Queue(QUEUE_DRAFTING), Queue(QUEUE_BULK)),
+    task_default_queue=QUEUE_INTERACTIVE,
+    task_routes={
+        "process_pipeline_task": {"queue": QUEUE_INTERACTIVE},
+        "draft_response_task": {"queue": QUEUE_DRAFTING},
+        "process_batch_task": {"queue": QUEUE_BULK},
+    },
 )
 
+if WORKER_MODE == "async":
+    # as threads só aguardam as corrotinas no loop persistente do processo (app/services/async_runtime.py);
+    # prefetch 1 evita reservar mensagens além das pipelines que cabem no semáforo
+    celery.conf.update(worker_pool="threads", worker_concurrency=WORKER_MAX_IN_FLIGHT, worker_prefetch_multiplier=1)
+elif WORKER_MODE != "prefork":
+    raise ValueError(f"WORKER_MODE inválido: {WORKER_MODE!r} (use prefork ou async)")
+
 celery.conf.update(imports=("app.services.tasks",))
\ No newline at end of file
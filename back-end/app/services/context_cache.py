@@ -0,0 +1,199 @@
+import asyncio
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Protocol
+
+from app.core.constants import (
+    IA_CONTEXT_CACHE_ENABLED,
+    IA_CONTEXT_CACHE_PROVIDER,
+    IA_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS,
+    IA_CONTEXT_CACHE_RETRY_SECONDS,
+    IA_CONTEXT_CACHE_TTL_SECONDS,
+)
+from app.services.genai_client import client_manager, genai_types
+from app.services.prompts import PromptTemplate
+
+
+@dataclass
+class CacheHandle:
+    name: str
+    expires_at: float
+    token_count: int
+
+
+class ContextCacheProvider(Protocol):
+    # False quando o handle só existe localmente e não pode ser enviado ao modelo
+    remote: bool
+
+    def create(self, model: str, prefix: str, ttl_seconds: int) -> CacheHandle: ...
+
+    def refresh(self, handle: CacheHandle, ttl_seconds: int) -> CacheHandle: ...
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class GenAIContextCacheProvider:
+    """Usa `client.caches` do SDK (cached content) para guardar o prefixo estático no provedor."""
+
+    remote = True
+
+    def create(self, model: str, prefix: str, ttl_seconds: int) -> CacheHandle:
+        client = client_manager.get_client()
+        cached = client.caches.create(
+            model=model,
+            config=genai_types.CreateCachedContentConfig(
+                contents=[genai_types.Content(role="user", parts=[genai_types.Part.from_text(text=prefix)])],
+                ttl=f"{ttl_seconds}s",
+                display_name="autou-prompt-prefix",
+            ),
+        )
+        usage = getattr(cached, "usage_metadata", None)
+        token_count = getattr(usage, "total_token_count", None) or _estimate_tokens(prefix)
+        return CacheHandle(name=cached.name, expires_at=time.time() + ttl_seconds, token_count=token_count)
+
+    def refresh(self, handle: CacheHandle, ttl_seconds: int) -> CacheHandle:
+        client = client_manager.get_client()
+        client.caches.update(
+            name=handle.name,
+            config=genai_types.UpdateCachedContentConfig(ttl=f"{ttl_seconds}s"),
+        )
+        return CacheHandle(name=handle.name, expires_at=time.time() + ttl_seconds, token_count=handle.token_count)
+
+
+class FakeContextCacheProvider:
+    """Provedor em memória para testes offline; não faz chamadas de rede.
+
+    Cobre só o ciclo de vida do handle (criação, renovação, invalidação e métricas): o handle não existe no GenAI,
+    então a geração recebe o prompt completo, sem `cached_content`.
+    """
+
+    remote = False
+
+    def __init__(self):
+        self.contents: Dict[str, str] = {}
+
+    def create(self, model: str, prefix: str, ttl_seconds: int) -> CacheHandle:
+        name = f"cachedContents/fake-{uuid.uuid4().hex[:12]}"
+        self.contents[name] = prefix
+        return CacheHandle(name=name, expires_at=time.time() + ttl_seconds, token_count=_estimate_tokens(prefix))
+
+    def refresh(self, handle: CacheHandle, ttl_seconds: int) -> CacheHandle:
+        if handle.name not in self.contents:
+            raise KeyError(handle.name)
+        return CacheHandle(name=handle.name, expires_at=time.time() + ttl_seconds, token_count=handle.token_count)
+
+
+class ContextCacheManager:
+    """Mantém um handle de cached content por (modelo, template), renovado antes de expirar."""
+
+    def __init__(self, provider: ContextCacheProvider, ttl_seconds: int, refresh_margin_seconds: int, retry_seconds: int):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._create_lock = threading.Lock()
+        self._handles: Dict[tuple[str, str], CacheHandle] = {}
+        self._failed_until: Dict[tuple[str, str], float] = {}
+        self._stats = {
+            "created": 0,
+            "refreshed": 0,
+            "failures": 0,
+            "requests_with_cache": 0,
+            "prompt_tokens_saved": 0,
+        }
+
+    def _incr(self, stat: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[stat] += amount
+
+    def _fresh(self, handle: CacheHandle | None) -> bool:
+        return handle is not None and time.time() < handle.expires_at - self.refresh_margin_seconds
+
+    def _peek(self, key: tuple[str, str]) -> str | None:
+        handle = self._handles.get(key)
+        if self._fresh(handle):
+            return handle.name
+        return None
+
+    def get_handle(self, model: str, template: PromptTemplate) -> str | None:
+        key = (model, template.cache_id)
+        name = self._peek(key)
+        if name is not None:
+            return name
+        with self._create_lock:
+            name = self._peek(key)
+            if name is not None:
+                return name
+            if time.time() < self._failed_until.get(key, 0.0):
+                return None
+            current = self._handles.get(key)
+            try:
+                if current is not None and time.time() < current.expires_at:
+                    try:
+                        handle = self.provider.refresh(current, self.ttl_seconds)
+                        self._incr("refreshed")
+                    except Exception:
+                        handle = self.provider.create(model, template.static_prefix, self.ttl_seconds)
+                        self._incr("created")
+                else:
+                    handle = self.provider.create(model, template.static_prefix, self.ttl_seconds)
+                    self._incr("created")
+            except Exception:
+                # modelo sem suporte a cache ou prefixo abaixo do mínimo: usa o prompt completo por um tempo
+                self._incr("failures")
+                self._handles.pop(key, None)
+                self._failed_until[key] = time.time() + self.retry_seconds
+                return None
+            self._handles[key] = handle
+            return handle.name
+
+    async def aget_handle(self, model: str, template: PromptTemplate) -> str | None:
+        name = self._peek((model, template.cache_id))
+        if name is not None:
+            return name
+        return await asyncio.to_thread(self.get_handle, model, template)
+
+    @property
+    def remote(self) -> bool:
+        return getattr(self.provider, "remote", True)
+
+    def invalidate(self, handle_name: str) -> None:
+        with self._create_lock:
+            for key, handle in list(self._handles.items()):
+                if handle.name == handle_name:
+                    self._handles.pop(key, None)
+
+    def record_usage(self, handle_name: str, usage: Any = None) -> None:
+        reported = getattr(usage, "cached_content_token_count", None) if usage is not None else None
+        if reported is None:
+            handle = next((h for h in list(self._handles.values()) if h.name == handle_name), None)
+            reported = handle.token_count if handle is not None else 0
+        with self._lock:
+            self._stats["requests_with_cache"] += 1
+            self._stats["prompt_tokens_saved"] += int(reported or 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["active_handles"] = sum(1 for h in self._handles.values() if self._fresh(h))
+        stats["enabled"] = IA_CONTEXT_CACHE_ENABLED
+        return stats
+
+
+def _build_provider() -> ContextCacheProvider:
+    if IA_CONTEXT_CACHE_PROVIDER == "fake":
+        return FakeContextCacheProvider()
+    return GenAIContextCacheProvider()
+
+
+context_cache = ContextCacheManager(
+    _build_provider(),
+    ttl_seconds=IA_CONTEXT_CACHE_TTL_SECONDS,
+    refresh_margin_seconds=IA_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS,
+    retry_seconds=IA_CONTEXT_CACHE_RETRY_SECONDS,
+)
@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import time
+
+from app.core.constants import DEDUP_WINDOW_SECONDS, IDEMPOTENCY_TTL_SECONDS, REDIS_URL, TASK_STATUS_TTL_SECONDS
+from app.services import task_status
+
+DEDUP_PREFIX = "autou:dedup"
+
+# devolve a task já associada a alguma das chaves ou, se nenhuma existir, associa todas à task nova;
+# quando encontra uma task, as demais chaves passam a apontar para ela (ex.: Idempotency-Key de um reenvio).
+# O último KEY é o hash de status da task nova: recebe "queued" no mesmo passo, para que um envio concorrente
+# nunca encontre a reserva sem status (e a trate como abandonada)
+_CLAIM_SCRIPT = """
+local n = #KEYS - 1
+local found = false
+for i = 1, n do
+  local value = redis.call('GET', KEYS[i])
+  if value then
+    found = value
+    break
+  end
+end
+local target = found or ARGV[1]
+for i = 1, n do
+  if redis.call('GET', KEYS[i]) ~= target then
+    redis.call('SET', KEYS[i], target, 'EX', ARGV[i + 1])
+  end
+end
+if not found then
+  redis.call('HSET', KEYS[n + 1], 'status', ARGV[n + 2], 'user_id', ARGV[n + 3], 'updated_at', ARGV[n + 4])
+  redis.call('EXPIRE', KEYS[n + 1], ARGV[n + 5])
+end
+return found
+"""
+
+_redis = None
+_redis_loop = None
+_claim_script = None
+
+
+def _get_redis():
+    global _redis, _redis_loop, _claim_script
+    loop = asyncio.get_running_loop()
+    if _redis is None or _redis_loop is not loop:
+        import redis.asyncio as redis_asyncio
+
+        _redis = redis_asyncio.from_url(REDIS_URL, socket_connect_timeout=0.5, socket_timeout=2.0, decode_responses=True)
+        _redis_loop = loop
+        _claim_script = _redis.register_script(_CLAIM_SCRIPT)
+    return _redis
+
+
+def text_hash(text: str) -> str:
+    # espaços nas pontas e quebras de linha do navegador não mudam o conteúdo
+    normalized = "\n".join(line.rstrip() for line in text.strip().splitlines())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def content_key(user_id: int, content_hash: str) -> tuple[str, int]:
+    return f"{DEDUP_PREFIX}:content:{user_id}:{content_hash}", DEDUP_WINDOW_SECONDS
+
+
+def idempotency_key(user_id: int, key: str) -> tuple[str, int]:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return f"{DEDUP_PREFIX}:idem:{user_id}:{digest}", IDEMPOTENCY_TTL_SECONDS
+
+
+async def claim(keys: list[tuple[str, int]], task_id: str, user_id: int) -> str | None:
+    """Reserva as chaves para `task_id` (gravando o status "queued" dela); retorna a task existente se alguma chave
+    já estava reservada.
+
+    Best-effort: sem Redis nada é deduplicado (retorna None).
+    """
+    if not keys:
+        return None
+    try:
+        _get_redis()
+        found = await _claim_script(
+            keys=[*(k for k, _ in keys), task_status.status_key(task_id)],
+            args=[task_id, *(ttl for _, ttl in keys), task_status.QUEUED, user_id, time.time(), TASK_STATUS_TTL_SECONDS],
+        )
+    except Exception:
+        return None
+    return found or None
+
+
+async def reassign(keys: list[tuple[str, int]], task_id: str, user_id: int) -> None:
+    """Aponta as chaves para uma task nova (a anterior falhou ou o status dela já expirou)."""
+    try:
+        pipe = _get_redis().pipeline(transaction=True)
+        pipe.hset(task_status.status_key(task_id), mapping={"status": task_status.QUEUED, "user_id": user_id, "updated_at": time.time()})
+        pipe.expire(task_status.status_key(task_id), TASK_STATUS_TTL_SECONDS)
+        for key, ttl in keys:
+            pipe.set(key, task_id, ex=ttl)
+        await pipe.execute()
+    except Exception:
+        pass
@@ -0,0 +1,109 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List
+
+from app.core.constants import IA_INPUT_TOKEN_BUDGET
+from app.services.nlp import tokenize
+
+# fatia do orçamento reservada ao início e à região da assinatura; o restante vai para as frases de maior pontuação
+HEAD_SHARE = 0.3
+SIGNATURE_SHARE = 0.2
+# trechos sem pontuação (ex.: tabelas de PDF) são quebrados em blocos de até N palavras
+MAX_UNIT_WORDS = 60
+
+_UNIT_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n+")
+_CLOSING = re.compile(
+    r"^\s*(atenciosamente|att\.?|atte\.?|cordialmente|abra[çc]os?|obrigad[oa]s?|grat[oa]|saudações|sds\.?|--)\b",
+    re.IGNORECASE,
+)
+
+
+def _units(text: str) -> List[str]:
+    units: List[str] = []
+    for part in _UNIT_SPLIT.split(text):
+        words = part.split()
+        for start in range(0, len(words), MAX_UNIT_WORDS):
+            units.append(" ".join(words[start:start + MAX_UNIT_WORDS]))
+    return units
+
+
+def _signature_window(units: List[str], unit_tokens: List[List[str]], budget: int, taken: set) -> List[int]:
+    """Índices ao redor do último fechamento (ex.: "Atenciosamente"); sem fechamento, o fim do texto."""
+    closing = next((i for i in range(len(units) - 1, -1, -1) if _CLOSING.match(units[i])), None)
+    if closing is None:
+        candidates = range(len(units) - 1, -1, -1)
+    else:
+        # o fechamento e as duas linhas seguintes (nome, cargo), depois o que vem logo antes dele
+        after = range(closing, min(closing + 3, len(units)))
+        candidates = [*after, *range(closing - 1, -1, -1)]
+    picked: List[int] = []
+    used = 0
+    for i in candidates:
+        if i in taken:
+            break
+        size = len(unit_tokens[i])
+        if used + size > budget:
+            break
+        picked.append(i)
+        used += size
+    return picked
+
+
+def fit_budget(text: str, nlp_res: Dict, budget: int = IA_INPUT_TOKEN_BUDGET) -> Dict:
+    """Limita o `cleaned_text` enviado ao LLM a `budget` tokens (0 desativa).
+
+    Mantém o início, a região da assinatura e as frases com maior pontuação (frequência dos tokens no documento),
+    na ordem original. `tokens` e as contagens continuam refletindo o texto inteiro.
+    """
+    total = nlp_res.get("total_tokens", 0)
+    if not budget or total <= budget:
+        return {**nlp_res, "truncated": False}
+
+    units = _units(text)
+    unit_tokens = [tokenize(unit) for unit in units]
+    selected: set = set()
+    used = 0
+
+    head_budget = int(budget * HEAD_SHARE)
+    for i, tokens in enumerate(unit_tokens):
+        if used + len(tokens) > head_budget:
+            break
+        selected.add(i)
+        used += len(tokens)
+    if not selected and unit_tokens:
+        # primeira frase maior que a fatia do início: entra mesmo assim e é cortada no limite final
+        selected.add(0)
+        used += len(unit_tokens[0])
+
+    for i in _signature_window(units, unit_tokens, int(budget * SIGNATURE_SHARE), selected):
+        selected.add(i)
+        used += len(unit_tokens[i])
+
+    counts = Counter(nlp_res.get("tokens") or [])
+
+    def _score(tokens: List[str]) -> float:
+        # frequência dos termos distintos, normalizada para não favorecer só frases longas
+        return sum(counts[t] for t in set(tokens)) / math.sqrt(len(tokens))
+
+    ranked = sorted((i for i, tokens in enumerate(unit_tokens) if tokens and i not in selected), key=lambda i: _score(unit_tokens[i]), reverse=True)
+    for i in ranked:
+        if used >= budget:
+            break
+        if used + len(unit_tokens[i]) <= budget:
+            selected.add(i)
+            used += len(unit_tokens[i])
+
+    kept = [token for i in sorted(selected) for token in unit_tokens[i]][:budget]
+    return {
+        **nlp_res,
+        "cleaned_text": " ".join(kept),
+        "truncated": True,
+        "excerpt": {
+            "budget": budget,
+            "original_tokens": total,
+            "kept_tokens": len(kept),
+            "units_kept": len(selected),
+            "units_total": len(units),
+        },
+    }
@@ -0,0 +1,111 @@
+import asyncio
+import random
+import time
+
+from app.core.constants import BULK_USER_BURST, BULK_USER_RATE, REDIS_URL
+
+BUCKET_PREFIX = "autou:bulk:bucket"
+# blocos enfileirados e ainda não concluídos, por usuário
+PENDING_KEY = "autou:bulk:pending"
+# contador sem atualização por esse tempo (ex.: worker morto no meio do lote) deixa de contar
+PENDING_TTL_SECONDS = 3600
+
+# token bucket atômico: repõe `rate` tokens/s até `burst`; devolve 0 se consumiu ou os ms até haver tokens.
+# Só cobra quando outro usuário tem blocos pendentes: sozinho na fila, o usuário usa toda a capacidade
+_ACQUIRE_SCRIPT = """
+local contended = false
+local pending = redis.call('HGETALL', KEYS[2])
+for i = 1, #pending, 2 do
+  if pending[i] ~= ARGV[5] and tonumber(pending[i + 1]) > 0 then
+    contended = true
+    break
+  end
+end
+if not contended then
+  return 0
+end
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait_ms = 0
+if tokens >= cost then
+  tokens = tokens - cost
+else
+  wait_ms = math.ceil((cost - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return wait_ms
+"""
+
+_redis = None
+_redis_loop = None
+_script = None
+
+
+def _get_script():
+    global _redis, _redis_loop, _script
+    loop = asyncio.get_running_loop()
+    if _redis is None or _redis_loop is not loop:
+        import redis.asyncio as redis_asyncio
+
+        _redis = redis_asyncio.from_url(REDIS_URL, socket_connect_timeout=0.5, socket_timeout=2.0)
+        _redis_loop = loop
+        _script = _redis.register_script(_ACQUIRE_SCRIPT)
+    return _script
+
+
+async def _adjust_pending(user_id: int, delta: int) -> None:
+    try:
+        _get_script()
+        pipe = _redis.pipeline(transaction=True)
+        pipe.hincrby(PENDING_KEY, str(user_id), delta)
+        pipe.expire(PENDING_KEY, PENDING_TTL_SECONDS)
+        count = (await pipe.execute())[0]
+        if int(count) <= 0:
+            await _redis.hdel(PENDING_KEY, str(user_id))
+    except Exception:
+        pass
+
+
+async def mark_enqueued(user_id: int | None, chunks: int) -> None:
+    """Registra blocos do usuário na fila bulk (chamado pela API antes de enfileirar)."""
+    if user_id is not None and chunks > 0:
+        await _adjust_pending(user_id, chunks)
+
+
+async def mark_done(user_id: int | None, chunks: int = 1) -> None:
+    if user_id is not None and chunks > 0:
+        await _adjust_pending(user_id, -chunks)
+
+
+def backoff(wait: float) -> float:
+    # jitter: blocos adiados juntos não voltam todos no mesmo instante
+    return wait + random.uniform(0, max(wait, 1.0))
+
+
+async def acquire(user_id: int | None, cost: int = 1) -> float:
+    """Consome `cost` e-mails do bucket do usuário quando há outros usuários com blocos pendentes; retorna quantos
+    segundos esperar (0 = liberado).
+
+    Best-effort: sem Redis, ou com BULK_USER_RATE <= 0, nunca segura o lote.
+    """
+    if user_id is None or BULK_USER_RATE <= 0:
+        return 0.0
+    burst = max(1, BULK_USER_BURST)
+    # blocos maiores que a rajada nunca caberiam no bucket
+    cost = max(1, min(cost, burst))
+    try:
+        script = _get_script()
+        wait_ms = await script(
+            keys=[f"{BUCKET_PREFIX}:{user_id}", PENDING_KEY],
+            args=[BULK_USER_RATE, burst, time.time(), cost, str(user_id)],
+        )
+    except Exception:
+        return 0.0
+    return int(wait_ms) / 1000
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import threading
+from typing import Any, Dict
+
+import httpx
+import google.genai as genai
+
+from app.core.constants import (
+    GENAI_API_KEY,
+    GENAI_HTTP_KEEPALIVE_EXPIRY,
+    GENAI_HTTP_MAX_CONNECTIONS,
+    GENAI_HTTP_MAX_KEEPALIVE,
+    GENAI_MAX_OUTPUT_TOKENS,
+    GENAI_TEMPERATURE,
+)
+
+try:
+    from google.genai import types as genai_types
+except Exception:
+    genai_types = None
+
+
+class GenAIClientManager:
+    """Mantém um único genai.Client por processo, com pool HTTP keep-alive e config reaproveitados."""
+
+    def __init__(self, api_key: str | None):
+        self.api_key = api_key
+        self._lock = threading.Lock()
+        self._client = None
+        self._configs: Dict[tuple[str | None, int | None], Any] = {}
+        self._pid = None
+        self._aio_client = None
+        self._aio_loop = None
+        self._stats = {"clients_created": 0, "async_clients_created": 0, "requests": 0, "new_connections": 0}
+
+    def _incr(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.started":
+            self._incr("new_connections")
+
+    def _on_request(self, request: httpx.Request) -> None:
+        self._incr("requests")
+        request.extensions["trace"] = self._trace
+
+    async def _atrace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self._trace(event_name, info)
+
+    async def _on_async_request(self, request: httpx.Request) -> None:
+        self._incr("requests")
+        request.extensions["trace"] = self._atrace
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=GENAI_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=GENAI_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=GENAI_HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    def _build_client(self):
+        if genai_types is not None:
+            http_options = genai_types.HttpOptions(
+                client_args={"limits": self._limits(), "event_hooks": {"request": [self._on_request]}},
+                async_client_args={"limits": self._limits(), "event_hooks": {"request": [self._on_async_request]}},
+            )
+            return genai.Client(api_key=self.api_key, http_options=http_options)
+        return genai.Client(api_key=self.api_key)
+
+    def _check_configured(self) -> None:
+        if not self.api_key:
+            raise RuntimeError("GenAI API not configured: set GENAI_API_KEY")
+        if not hasattr(genai, "Client"):
+            raise RuntimeError("google.genai client (genai.Client) is not available in this environment")
+
+    def get_client(self):
+        self._check_configured()
+        pid = os.getpid()
+        with self._lock:
+            if self._client is None or self._pid != pid:
+                # após fork (Celery prefork) o pool herdado não pode ser reutilizado
+                self._client = self._build_client()
+                self._pid = pid
+                self._stats["clients_created"] += 1
+            return self._client
+
+    def get_async_client(self):
+        """Retorna `client.aio` ligado ao event loop atual; conexões async não sobrevivem a outro loop."""
+        self._check_configured()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._aio_client is None or self._aio_loop is not loop:
+                self._aio_client = self._build_client()
+                self._aio_loop = loop
+                self._stats["async_clients_created"] += 1
+            aio = getattr(self._aio_client, "aio", None)
+        if aio is None:
+            raise RuntimeError("google.genai async client (client.aio) is not available in this environment")
+        return aio
+
+    def get_config(self, cached_content: str | None = None, max_output_tokens: int | None = None):
+        if genai_types is None:
+            return None
+        key = (cached_content, max_output_tokens)
+        config = self._configs.get(key)
+        if config is None:
+            config = genai_types.GenerateContentConfig(
+                max_output_tokens=max_output_tokens or GENAI_MAX_OUTPUT_TOKENS,
+                temperature=GENAI_TEMPERATURE,
+                cached_content=cached_content,
+            )
+            with self._lock:
+                # handles antigos de context cache expiram; evita crescer indefinidamente
+                if len(self._configs) > 16:
+                    self._configs = {k: v for k, v in self._configs.items() if k[0] is None}
+                self._configs[key] = config
+        return config
+
+    def reset(self) -> None:
+        with self._lock:
+            self._client = None
+            self._pid = None
+            self._aio_client = None
+            self._aio_loop = None
+
+    def _after_fork(self) -> None:
+        # o lock pode ter sido herdado travado por outra thread do processo pai
+        self._lock = threading.Lock()
+        self._client = None
+        self._pid = None
+        self._aio_client = None
+        self._aio_loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["reused_connections"] = max(0, stats["requests"] - stats["new_connections"])
+        stats["reuse_ratio"] = round(stats["reused_connections"] / stats["requests"], 4) if stats["requests"] else 0.0
+        return stats
+
+
+client_manager = GenAIClientManager(GENAI_API_KEY)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=client_manager._after_fork)
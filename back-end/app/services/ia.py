@@ -1,10 +1,37 @@
 import asyncio
+import contextvars
 import os
+import re
+import threading
+import weakref
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
 import google.genai as genai
-from app.models import Category
-from app.core.constants import GENAI_API_KEY, GENAI_MAX_OUTPUT_TOKENS, GENAI_MODEL, GENAI_TEMPERATURE, IA_ASYNC_WORKERS
+from app.models import Category, ClassifiedBy
+from app.core.constants import (
+    GENAI_API_KEY,
+    GENAI_MAX_OUTPUT_TOKENS,
+    GENAI_MODEL,
+    GENAI_TEMPERATURE,
+    IA_ASYNC_WORKERS,
+    IA_BACKEND,
+    IA_CLASSIFY_MAX_OUTPUT_TOKENS,
+    IA_CACHE_ENABLED,
+    IA_CACHE_MAX_ITEMS,
+    IA_CACHE_TTL_SECONDS,
+    IA_CACHE_USE_REDIS,
+    IA_CONTEXT_CACHE_ENABLED,
+    IA_MAX_IN_FLIGHT,
+    IA_PACK_MAX_INPUT_CHARS,
+    IA_PACK_MAX_ITEMS,
+    IA_PACK_TOKENS_PER_ITEM,
+    REDIS_URL,
+)
+from app.services.cache import TwoTierCache, content_key, normalize_text
+from app.services.context_cache import context_cache
+from app.services.genai_client import client_manager, genai_types
+from app.services.prompts import get_template
 
 if GENAI_API_KEY:
     try:
@@ -16,41 +43,65 @@ if GENAI_API_KEY:
         pass
 
 
-def _call_genai_blocking(prompt: str) -> str:
-    if not GENAI_API_KEY:
-        raise RuntimeError("GenAI API not configured: set GENAI_API_KEY")
-    if not hasattr(genai, "Client"):
-        raise RuntimeError("google.genai client (genai.Client) is not available in this environment")
+def _build_contents(prompt: str):
+    return [
+        genai_types.Content(
+            role="user",
+            parts=[genai_types.Part.from_text(text=prompt)],
+        )
+    ]
+
+
+def _chunk_text(chunk) -> str:
+    return str(
+        getattr(chunk, "text", None)
+        or getattr(chunk, "delta", None)
+        or getattr(chunk, "content", None)
+        or str(chunk)
+    )
+
 
+# destino opcional dos chunks gerados (ex.: ChunkRelay do pipeline em execução)
+_CHUNK_SINK: contextvars.ContextVar[Callable[[str], None] | None] = contextvars.ContextVar("ia_chunk_sink", default=None)
+
+
+@contextmanager
+def stream_chunks_to(sink: Callable[[str], None] | None):
+    token = _CHUNK_SINK.set(sink)
     try:
-        try:
-            from google.genai import types as genai_types
-        except Exception:
-            genai_types = None
-        client = genai.Client(api_key=GENAI_API_KEY)
+        yield
+    finally:
+        _CHUNK_SINK.reset(token)
+
 
+def _record_usage(cached_content: str | None, usage) -> None:
+    if cached_content is not None:
+        context_cache.record_usage(cached_content, usage)
+
+
+def _call_genai_blocking(prompt: str, cached_content: str | None = None, max_output_tokens: int | None = None) -> str:
+    client = client_manager.get_client()
+    config = client_manager.get_config(cached_content, max_output_tokens)
+    usage = None
+    sink = _CHUNK_SINK.get()
+
+    try:
         if genai_types is not None:
-            contents = [
-                genai_types.Content(
-                    role="user",
-                    parts=[genai_types.Part.from_text(text=prompt)],
-                )
-            ]
-            config = genai_types.GenerateContentConfig(max_output_tokens=GENAI_MAX_OUTPUT_TOKENS, temperature=GENAI_TEMPERATURE)
+            contents = _build_contents(prompt)
 
             if hasattr(client.models, "generate_content_stream"):
-                response_text = ""
+                chunks: list[str] = []
                 for chunk in client.models.generate_content_stream(model=GENAI_MODEL, contents=contents, config=config):
-                    chunk_text = (
-                        getattr(chunk, "text", None)
-                        or getattr(chunk, "delta", None)
-                        or getattr(chunk, "content", None)
-                        or str(chunk)
-                    )
-                    response_text += str(chunk_text)
+                    piece = _chunk_text(chunk)
+                    chunks.append(piece)
+                    if sink is not None:
+                        sink(piece)
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                response_text = "".join(chunks)
             else:
                 resp = client.models.generate_content(model=GENAI_MODEL, contents=contents, config=config)
                 response_text = getattr(resp, "text", str(resp))
+                usage = getattr(resp, "usage_metadata", None)
         else:
             resp = client.models.generate_content(
                 model=GENAI_MODEL,
@@ -62,10 +113,92 @@ def _call_genai_blocking(prompt: str) -> str:
     except Exception as exc:
         raise RuntimeError(f"genai.Client call failed: {exc}") from exc
 
-
+    _record_usage(cached_content, usage)
     return response_text
 
 
+_IN_FLIGHT: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _in_flight_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _IN_FLIGHT.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(max(1, IA_MAX_IN_FLIGHT))
+        _IN_FLIGHT[loop] = sem
+    return sem
+
+
+async def _call_genai_async(prompt: str, cached_content: str | None = None, max_output_tokens: int | None = None) -> str:
+    client = client_manager.get_async_client()
+    config = client_manager.get_config(cached_content, max_output_tokens)
+    contents = _build_contents(prompt)
+    usage = None
+    sink = _CHUNK_SINK.get()
+
+    async with _in_flight_semaphore():
+        try:
+            chunks: list[str] = []
+            stream = await client.models.generate_content_stream(model=GENAI_MODEL, contents=contents, config=config)
+            async for chunk in stream:
+                piece = _chunk_text(chunk)
+                chunks.append(piece)
+                if sink is not None:
+                    sink(piece)
+                usage = getattr(chunk, "usage_metadata", None) or usage
+        except Exception as exc:
+            raise RuntimeError(f"genai.Client async call failed: {exc}") from exc
+
+    _record_usage(cached_content, usage)
+    return "".join(chunks)
+
+
+_INFER_EXECUTOR = ThreadPoolExecutor(max_workers=IA_ASYNC_WORKERS)
+
+
+def _use_async_backend() -> bool:
+    return IA_BACKEND == "async" and genai_types is not None
+
+
+async def call_genai(prompt: str, cached_content: str | None = None, max_output_tokens: int | None = None) -> str:
+    if _use_async_backend():
+        return await _call_genai_async(prompt, cached_content, max_output_tokens)
+    loop = asyncio.get_running_loop()
+    # copia o contexto para que a thread enxergue o sink de streaming
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_INFER_EXECUTOR, ctx.run, _call_genai_blocking, prompt, cached_content, max_output_tokens)
+
+
+async def _generate(render_full, render_dynamic, max_output_tokens: int | None = None) -> str:
+    """Com context cache ativo envia só a parte dinâmica; se o handle falhar, refaz com o prompt completo."""
+    template = get_template()
+    cached_content = None
+    if IA_CONTEXT_CACHE_ENABLED and genai_types is not None:
+        cached_content = await context_cache.aget_handle(GENAI_MODEL, template)
+        if not context_cache.remote:
+            # handle do provedor fake: não existe no GenAI, o modelo recebe o prompt completo
+            cached_content = None
+    if cached_content is not None:
+        sink = _CHUNK_SINK.get()
+        relayed = False
+
+        def _tracking_sink(piece: str) -> None:
+            nonlocal relayed
+            relayed = relayed or bool(piece)
+            sink(piece)
+
+        try:
+            with stream_chunks_to(_tracking_sink if sink is not None else None):
+                return await call_genai(render_dynamic(template), cached_content=cached_content, max_output_tokens=max_output_tokens)
+        except Exception:
+            context_cache.invalidate(cached_content)
+            # a tentativa falhou no meio do stream: o cliente descarta o texto parcial antes da nova geração
+            reset = getattr(sink, "reset", None)
+            if relayed and reset is not None:
+                reset()
+    return await call_genai(render_full(template), max_output_tokens=max_output_tokens)
+
+
 def _clean_sdk_artifacts(s: str) -> str:
     if not s:
         return s
@@ -106,124 +239,240 @@ def _clean_sdk_artifacts(s: str) -> str:
     return out
 
 def build_prompt(text: str, username: str | None = None) -> str:
-    examples = [
-        {
-            "email": "Prezada equipe,\n\nFinalizei o relatório trimestral de desempenho e já o disponibilizei na pasta compartilhada: \\\\Servidor\\Projetos\\Relatorios\\2025_Q1\\.\nAlém do relatório em PDF, incluí também uma planilha em Excel com os indicadores detalhados por área (financeiro, comercial e operacional).\r\n\r\nMarquei a reunião de revisão para quarta-feira, dia 15/10, às 14h, via Microsoft Teams. O link já está no calendário, mas segue aqui também: https://teams.microsoft.com/l/meetup-join/123.\n\nPeço que todos leiam os tópicos 3.2 e 4.1 do relatório antes da reunião, pois serão foco de discussão.\n\nAtenciosamente,\nCarlos",
-            "category": "PRODUTIVO",
-            "reason": "O email contém entrega de relatórios, anexos em formatos diferentes, local de armazenamento, link de reunião e instruções claras para preparação.",
-            "suggested_response": "Olá Carlos,\n\nObrigado pelo envio do relatório trimestral e da planilha detalhada. Já acessamos os arquivos na pasta compartilhada (\\\\Servidor\\Projetos\\Relatorios\\2025_Q1\\).\n\nVamos revisar especialmente os tópicos 3.2 e 4.1 antes da reunião de quarta-feira (15/10 às 14h).\n\nAté lá,\nEquipe"
-        },
-        {
-            "email": "Bom dia,\n\nEnviei a versão final do contrato com o cliente XYZ. O documento foi salvo em: C:\\Users\\Public\\Documentos\\Contratos\\XYZ_Final.pdf\n\nSolicito que a equipe jurídica faça a revisão até amanhã, 29/09, para que possamos enviar ao cliente ainda dentro do prazo.\r\n\r\nAlém disso, precisamos que o time de finanças valide os valores da cláusula 5.3 (ajustes de pagamento).\n\nAbraços,\nFernanda",
-            "category": "PRODUTIVO",
-            "reason": "O email trata de contrato, prazos de revisão e validação de cláusulas financeiras.",
-            "suggested_response": "Bom dia Fernanda,\n\nRecebemos o contrato salvo em C:\\Users\\Public\\Documentos\\Contratos\\XYZ_Final.pdf.\n\nA equipe jurídica vai revisar os pontos legais até amanhã (29/09) e o financeiro validará os valores da cláusula 5.3.\n\nTe daremos retorno antes do prazo.\n\nAbs,\nEquipe"
-        },
-        {
-            "email": "Prezados,\n\nO cronograma atualizado do projeto Ômega já está disponível em: /mnt/projetos/omega/cronograma_v2.xlsx\n\nAs principais mudanças:\n- Entrega do módulo de autenticação adiada para 20/10.\n- Inclusão de uma nova etapa de testes de integração entre 22/10 e 25/10.\r\n- Ajustes nas dependências do módulo de relatórios.\n\nPor favor, confirmem se todos os responsáveis estão de acordo com as novas datas.\n\nObrigado,\nMariana",
-            "category": "PRODUTIVO",
-            "reason": "O email comunica mudanças relevantes no cronograma e pede validação da equipe.",
-            "suggested_response": "Oi Mariana,\n\nObrigado pelo envio do cronograma atualizado em /mnt/projetos/omega/cronograma_v2.xlsx.\n\nJá verificamos as mudanças: entrega do módulo de autenticação (20/10), etapa de testes de integração (22/10-25/10) e ajustes no módulo de relatórios.\n\nNossa equipe confirma que está de acordo com as novas datas.\n\nAtenciosamente,\nEquipe"
-        },
-        {
-            "email": "Boa tarde,\n\nAnexei o documento Indicadores_Q2.pdf com os resultados de desempenho do segundo trimestre.\nPrincipais pontos a observar:\r\n1) Crescimento de 12% no setor comercial.\n2) Redução de custos operacionais em 8%.\n3) Atraso na entrega de dois projetos (detalhes no anexo).\n\nSolicito que cada gestor prepare comentários sobre os indicadores de sua área para a reunião de sexta-feira, às 11h.\n\nAbraços,\nBeatriz",
-            "category": "PRODUTIVO",
-            "reason": "O email contém indicadores de desempenho e solicita análise da equipe antes da reunião.",
-            "suggested_response": "Boa tarde Beatriz,\n\nObrigado pelo envio do documento Indicadores_Q2.pdf.\n\nJá notamos os principais pontos: crescimento comercial (12%), redução de custos operacionais (8%) e atrasos em dois projetos.\n\nCada gestor vai preparar os comentários de sua área antes da reunião de sexta-feira às 11h.\n\nAbs,\nEquipe"
-        },
-        {
-            "email": "Equipe,\n\nLembrando que o material para a apresentação do cliente XPTO deve ser finalizado até quinta-feira (02/10), às 18h.\nO conteúdo parcial está salvo no Google Drive: https://drive.google.com/projetoXPTO.\r\n\r\nAinda faltam os slides de resultados financeiros e o gráfico de tendências.\n\nPeço que cada responsável atualize sua parte até quarta-feira, para termos um dia de folga para revisão final.\n\n[]s,\nRafael",
-            "category": "PRODUTIVO",
-            "reason": "O email define prazos claros, aponta pendências e reforça a importância da entrega antecipada para revisão.",
-            "suggested_response": "Oi Rafael,\n\nObrigado pelo lembrete. Já acessamos o material no Google Drive (https://drive.google.com/projetoXPTO).\n\nCada responsável vai atualizar sua parte até quarta-feira, incluindo os slides de resultados financeiros e o gráfico de tendências.\n\nAssim teremos tempo de sobra para a revisão final na quinta.\n\n[]s,\nEquipe"
-        },
-        {
-            "email": "Oi pessoal,\n\nVocês acreditam que esqueci a marmita em casa hoje? kkkkk\nAlguém topa pedir hambúrguer comigo no almoço?\n\nValeu,\nJoão",
-            "category": "IMPRODUTIVO",
-            "reason": "Assunto pessoal, sem relação com o trabalho.",
-            "suggested_response": "Oi João,\nVamos combinar o almoço pessoalmente.\nNo email, seguimos focando nos temas de trabalho. :)"
-        },
-        {
-            "email": "Gente,\n\nOlhem esse vídeo hilário que encontrei:\nhttps://youtu.be/123xyz 😂😂😂\n\nNão consigo parar de rir kkkk\n\nAbraços,\nPedro",
-            "category": "IMPRODUTIVO",
-            "reason": "Compartilhamento de entretenimento sem relevância profissional.",
-            "suggested_response": "Oi Pedro,\nEsse tipo de conteúdo é melhor nos grupos informais.\nVamos manter o email apenas para trabalho."
-        },
-        {
-            "email": "Oi,\n\nVocês viram a nova temporada daquela série que todo mundo acompanha? Achei o final meio forçado rsrs\n\nPodemos comentar no café da tarde!\n\nBjs,\nLuiza",
-            "category": "IMPRODUTIVO",
-            "reason": "Discussão de série de TV não tem relação com tarefas ou entregas.",
-            "suggested_response": "Oi Luiza,\nCombinado, falamos da série no café.\nPor aqui seguimos só com os assuntos de trabalho. :)"
-        },
-        {
-            "email": "Fala galera,\n\nBora pedir pizza na sexta? Quais sabores vcs curtem mais? 🍕\n\nAbs,\nThiago",
-            "category": "IMPRODUTIVO",
-            "reason": "Assunto de refeição, informal e sem relação com demandas da equipe.",
-            "suggested_response": "Oi Thiago,\nMelhor alinharmos esse tipo de coisa pessoalmente.\nNo email seguimos só com trabalho."
-        },
-        {
-            "email": "Oi,\n\nAlguém sabe se segunda é feriado municipal mesmo? Não queria vir à toa kkkkk\n\nValeu,\nAndré",
-            "category": "IMPRODUTIVO",
-            "reason": "Informação facilmente obtida em calendário oficial, não precisa ser discutida por email corporativo.",
-            "suggested_response": "Oi André,\nConfirma no calendário oficial da empresa para ter certeza.\nAssim todos ficam alinhados."
-        }
-    ]
+    return get_template().render(text, username)
 
-    username_line = f"Nome do usuário: {username}\n" if username else ""
-
-    instructions = (
-        "INSTRUÇÕES (OBRIGATÓRIO): Você é um assistente que analisa e classifica e-mails em duas categorias: PRODUTIVO ou IMPRODUTIVO.\n"
-        "- PRODUTIVO: e-mails que requerem ação ou resposta específica.\n"
-        "- IMPRODUTIVO: e-mails que não necessitam de ação imediata (piadas, convites sociais, mensagens sem relação direta ao trabalho).\n\n"
-        "SAÍDA OBRIGATÓRIA:\n"
-        "1) PRIMEIRA LINHA: apenas a CATEGORIA em maiúsculas: PRODUTIVO ou IMPRODUTIVO.\n"
-        "2) SEGUNDA LINHA: 'CONFIDENCE: <valor>' entre 0 e 1.\n"
-        "3) TERCEIRA LINHA EM DIANTE: 'RESPOSTA_SUGERIDA:' seguido do texto da resposta.\n\n"
-        "REGRAS PARA RESPOSTA_SUGERIDA:\n"
-        "- É PROIBIDO repetir ou reescrever o conteúdo do e-mail recebido.\n"
-        "- Escreva como se fosse um colega respondendo ao remetente.\n"
-        "- A resposta deve ser curta, clara e acrescentar valor (ex.: agradecer, confirmar recebimento, indicar próxima ação).\n"
-        "- Use tom educado e profissional.\n"
-        "- Preserve/Crie formatação: quebras de linha (\\n, \\r), barras (\\\\), acentuação e caracteres especiais.\n\n"
-        "Exemplo negativo (NÃO FAZER):\n"
-        "Texto original: 'Finalizei o relatório e marquei reunião.'\n"
-        "Resposta incorreta: 'Você finalizou o relatório e marcou reunião.' (apenas reescreve o email)\n\n"
-        "Exemplo positivo (CORRETO):\n"
-        "Texto original: 'Finalizei o relatório e marquei reunião.'\n"
-        "Resposta correta: 'Obrigado pelo envio do relatório. Vou revisar e estarei presente na reunião.'\n"
-        "- Leia o email com atenção para descobrir quem é o remetente (se houver) e use o nome do usuário para assinar a resposta (Atenciosamente, <usuário>).\n"
-        "- Leia o texto do email cuidadosamente para entender o contexto e detalhes importantes.\n"
-        "- Utilize os exemplos abaixo para entender o estilo e formatação da resposta desejados.\n"
-    )
 
+def build_packed_prompt(texts: list[str], username: str | None = None) -> str:
+    return get_template().render_packed(texts, username)
 
-    ex_texts: list[str] = []
-    for ex in examples:
-        ex_lines = [
-            f"EMAIL: {ex.get('email','')}",
-            f"CATEGORIA: {ex.get('category','')}",
-            f"RAZAO: {ex.get('reason','')}",
-            f"RESPOSTA_SUGERIDA: {ex.get('suggested_response','')}",
-        ]
-        ex_texts.append("\n".join(ex_lines))
 
-    prompt_parts = [instructions, username_line, "\n\n".join(ex_texts), "\nANALISE O SEGUINTE EMAIL A PARTIR DAQUI:", "\nTEXTO:\n", text]
+_RESULT_CACHE = TwoTierCache(
+    "ia:result",
+    max_items=IA_CACHE_MAX_ITEMS,
+    ttl_seconds=IA_CACHE_TTL_SECONDS,
+    redis_url=REDIS_URL if IA_CACHE_USE_REDIS else None,
+)
 
-    prompt = "\n\n".join([p for p in prompt_parts if p])
-    return prompt
 
+def _result_cache_key(text: str, username: str | None) -> str:
+    # username entra na chave porque a resposta sugerida é assinada com ele
+    return content_key(normalize_text(text), GENAI_MODEL, GENAI_TEMPERATURE, get_template().cache_id, username or "")
 
-_INFER_EXECUTOR = ThreadPoolExecutor(max_workers=IA_ASYNC_WORKERS)
+
+def cache_stats() -> Dict[str, Any]:
+    return _RESULT_CACHE.stats()
+
+
+def client_stats() -> Dict[str, Any]:
+    return client_manager.stats()
+
+
+def context_cache_stats() -> Dict[str, Any]:
+    return context_cache.stats()
+
+
+_PACK_STATS_LOCK = threading.Lock()
+_PACK_STATS = {"packs_sent": 0, "items_packed": 0, "items_parsed": 0, "items_retried": 0}
+
+
+def _incr_pack_stat(stat: str, amount: int = 1) -> None:
+    with _PACK_STATS_LOCK:
+        _PACK_STATS[stat] += amount
+
+
+def pack_stats() -> Dict[str, Any]:
+    with _PACK_STATS_LOCK:
+        return dict(_PACK_STATS)
 
 
 async def infer_async(text: str, username: str | None = None) -> Dict[str, Any]:
-    prompt = build_prompt(text, username)
+    cache_key = _result_cache_key(text, username) if IA_CACHE_ENABLED else None
+    if cache_key is not None:
+        cached = await _RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+
     try:
-        loop = asyncio.get_event_loop()
-        response_text = await loop.run_in_executor(_INFER_EXECUTOR, _call_genai_blocking, prompt)
+        response_text = await _generate(
+            lambda t: t.render(text, username),
+            lambda t: t.dynamic_part(text, username),
+        )
     except Exception as exc:
         raise RuntimeError(f"GenAI async infer failed: {exc}") from exc
 
+    result = parse_response(response_text)
+    if cache_key is not None and result.get("category") != Category.SEM_CLASSIFICACAO.value:
+        await _RESULT_CACHE.set(cache_key, result)
+    return result
+
+
+def pack_size() -> int:
+    # cada item consome ~IA_PACK_TOKENS_PER_ITEM tokens de saída (categoria + resposta sugerida)
+    by_output_budget = GENAI_MAX_OUTPUT_TOKENS // max(1, IA_PACK_TOKENS_PER_ITEM)
+    return max(1, min(IA_PACK_MAX_ITEMS, by_output_budget))
+
+
+def _pack_groups(items: list[tuple[int, str]]) -> list[list[tuple[int, str]]]:
+    size = pack_size()
+    groups: list[list[tuple[int, str]]] = []
+    current: list[tuple[int, str]] = []
+    current_chars = 0
+    for idx, text in items:
+        if current and (len(current) >= size or current_chars + len(text) > IA_PACK_MAX_INPUT_CHARS):
+            groups.append(current)
+            current, current_chars = [], 0
+        current.append((idx, text))
+        current_chars += len(text)
+    if current:
+        groups.append(current)
+    return groups
+
+
+_PACKED_ITEM_RE = re.compile(r"^\s*#{2,}\s*ITEM\s+(\d+)\s*:?\s*$", flags=re.IGNORECASE | re.MULTILINE)
+
+
+def parse_packed_response(response_text: str, expected: int) -> Dict[int, Dict[str, Any]]:
+    if not response_text:
+        return {}
+    pieces = _PACKED_ITEM_RE.split(response_text)
+    parsed: Dict[int, Dict[str, Any]] = {}
+    # pieces = [preâmbulo, n1, corpo1, n2, corpo2, ...]
+    for i in range(1, len(pieces) - 1, 2):
+        try:
+            number = int(pieces[i])
+        except ValueError:
+            continue
+        if number < 1 or number > expected or number in parsed:
+            continue
+        result = parse_response(pieces[i + 1].strip())
+        if result.get("category") == Category.SEM_CLASSIFICACAO.value:
+            continue
+        parsed[number] = result
+    return parsed
+
+
+async def _infer_pack(group: list[tuple[int, str]], username: str | None) -> Dict[int, Dict[str, Any]]:
+    if len(group) == 1:
+        return {}
+    texts = [text for _, text in group]
+    _incr_pack_stat("packs_sent")
+    _incr_pack_stat("items_packed", len(group))
+    try:
+        response_text = await _generate(
+            lambda t: t.render_packed(texts, username),
+            lambda t: t.packed_dynamic_part(texts, username),
+        )
+    except Exception:
+        return {}
+    parsed = parse_packed_response(response_text, len(group))
+    _incr_pack_stat("items_parsed", len(parsed))
+    return {group[number - 1][0]: result for number, result in parsed.items()}
+
+
+async def infer_packed_async(texts: list[str], username: str | None = None) -> list[Dict[str, Any] | None]:
+    """Classifica vários emails por prompt; itens não interpretados são refeitos um a um (None se falharem)."""
+    results: list[Dict[str, Any] | None] = [None] * len(texts)
+    keys = [_result_cache_key(t, username) if IA_CACHE_ENABLED else None for t in texts]
+
+    pending: list[tuple[int, str]] = []
+    duplicates: Dict[int, list[int]] = {}
+    first_by_key: Dict[str, int] = {}
+    for idx, text in enumerate(texts):
+        if keys[idx] is not None:
+            if keys[idx] in first_by_key:
+                duplicates.setdefault(first_by_key[keys[idx]], []).append(idx)
+                continue
+            first_by_key[keys[idx]] = idx
+            cached = await _RESULT_CACHE.get(keys[idx])
+            if cached is not None:
+                results[idx] = dict(cached)
+                continue
+        pending.append((idx, text))
+
+    groups = _pack_groups(pending)
+    singles = {group[0][0] for group in groups if len(group) == 1}
+    packed = await asyncio.gather(*(_infer_pack(group, username) for group in groups))
+    for group_results in packed:
+        for idx, result in group_results.items():
+            results[idx] = result
+            if keys[idx] is not None:
+                await _RESULT_CACHE.set(keys[idx], result)
+
+    duplicate_indexes = {dup for dup_indexes in duplicates.values() for dup in dup_indexes}
+    missing = [idx for idx, result in enumerate(results) if result is None and idx not in duplicate_indexes]
+    _incr_pack_stat("items_retried", sum(1 for idx in missing if idx not in singles))
+    retried = await asyncio.gather(*(infer_async(texts[idx], username) for idx in missing), return_exceptions=True)
+    for idx, result in zip(missing, retried):
+        results[idx] = None if isinstance(result, BaseException) else result
+
+    for idx, dup_indexes in duplicates.items():
+        for dup in dup_indexes:
+            results[dup] = dict(results[idx]) if results[idx] is not None else None
+    return results
+
+
+async def classify_async(text: str) -> Dict[str, Any]:
+    """Chamada curta ao LLM só para categoria e confiança (sem resposta sugerida)."""
+    cache_key = content_key(normalize_text(text), GENAI_MODEL, GENAI_TEMPERATURE, get_template().cache_id, "classify") if IA_CACHE_ENABLED else None
+    if cache_key is not None:
+        cached = await _RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+
+    try:
+        # a saída da classificação não é texto para o usuário; não vai para o stream
+        with stream_chunks_to(None):
+            response_text = await _generate(
+                lambda t: t.render_classify(text),
+                lambda t: t.classify_dynamic_part(text),
+                max_output_tokens=IA_CLASSIFY_MAX_OUTPUT_TOKENS,
+            )
+    except Exception as exc:
+        raise RuntimeError(f"GenAI async classify failed: {exc}") from exc
+
+    parsed = parse_response(response_text)
+    result = {"category": parsed["category"], "confidence": parsed["confidence"], "classified_by": ClassifiedBy.LLM.value}
+    if cache_key is not None and result["category"] != Category.SEM_CLASSIFICACAO.value:
+        await _RESULT_CACHE.set(cache_key, result)
+    return result
+
+
+_DRAFT_LEADING_RE = re.compile(r"^\s*(?:CATEGORIA\s*:\s*)?(?:PRODUTIVO|IMPRODUTIVO)\s*\n(?:\s*CONFIDENCE\s*:[^\n]*\n)?", flags=re.IGNORECASE)
+_DRAFT_PREFIX_RE = re.compile(r"RESPOSTA_SUGERIDA\s*:\s*", flags=re.IGNORECASE)
+
+
+def parse_draft(response_text: str) -> str:
+    cleaned = _clean_sdk_artifacts(response_text) or ""
+    cleaned = _DRAFT_LEADING_RE.sub("", cleaned, count=1)
+    m = _DRAFT_PREFIX_RE.search(cleaned)
+    if m:
+        cleaned = cleaned[m.end():]
+    return cleaned.strip()
+
+
+async def draft_async(text: str, category: str, username: str | None = None) -> str:
+    """Gera só a resposta sugerida para um email cuja categoria já foi decidida."""
+    cache_key = content_key(_result_cache_key(text, username), "draft", category) if IA_CACHE_ENABLED else None
+    if cache_key is not None:
+        cached = await _RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            return cached.get("generated_response", "")
+
+    try:
+        response_text = await _generate(
+            lambda t: t.render_draft(text, category, username),
+            lambda t: t.draft_dynamic_part(text, category, username),
+        )
+    except Exception as exc:
+        raise RuntimeError(f"GenAI async draft failed: {exc}") from exc
+
+    draft = parse_draft(response_text)
+    if cache_key is not None and draft:
+        await _RESULT_CACHE.set(cache_key, {"generated_response": draft})
+    return draft
+
+
+def parse_response(response_text: str) -> Dict[str, Any]:
     cleaned = _clean_sdk_artifacts(response_text)
 
     category = Category.SEM_CLASSIFICACAO
@@ -0,0 +1,299 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+import numpy as np
+
+from app.core.constants import (
+    LOCAL_CLASSIFIER_ENABLED,
+    LOCAL_CLASSIFIER_FEATURES,
+    LOCAL_CLASSIFIER_PATH,
+    LOCAL_CLASSIFIER_RELOAD_INTERVAL_SECONDS,
+    LOCAL_CLASSIFIER_THRESHOLD,
+)
+from app.models import Category
+from app.services.nlp import preprocess_sync
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parents[2] / "models" / "local_classifier.npz"
+
+
+def _model_path() -> Path:
+    return Path(LOCAL_CLASSIFIER_PATH) if LOCAL_CLASSIFIER_PATH else DEFAULT_MODEL_PATH
+
+
+def featurize(tokens: list[str], n_features: int) -> tuple[np.ndarray, np.ndarray]:
+    """Bag-of-words (unigramas + bigramas) com hashing estável (crc32), log(1+tf) e normalização L2."""
+    counts: Dict[int, float] = {}
+    for i, token in enumerate(tokens):
+        idx = zlib.crc32(token.encode("utf-8")) % n_features
+        counts[idx] = counts.get(idx, 0.0) + 1.0
+        if i > 0:
+            bigram = f"{tokens[i - 1]} {token}"
+            idx = zlib.crc32(bigram.encode("utf-8")) % n_features
+            counts[idx] = counts.get(idx, 0.0) + 1.0
+    if not counts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    indexes = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    values /= np.linalg.norm(values) or 1.0
+    return indexes, values
+
+
+class LocalClassifier:
+    """Regressão logística binária (PRODUTIVO vs IMPRODUTIVO) sobre features com hashing."""
+
+    def __init__(self, weights: np.ndarray, bias: float, metadata: Dict[str, Any] | None = None):
+        self.weights = weights
+        self.bias = float(bias)
+        self.metadata = metadata or {}
+
+    @property
+    def n_features(self) -> int:
+        return int(self.weights.shape[0])
+
+    def prob_produtivo(self, tokens: list[str]) -> float:
+        indexes, values = featurize(tokens, self.n_features)
+        z = float(self.weights[indexes] @ values) + self.bias if indexes.size else self.bias
+        return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+
+    def predict(self, tokens: list[str]) -> Dict[str, Any]:
+        p = self.prob_produtivo(tokens)
+        category = Category.PRODUTIVO if p >= 0.5 else Category.IMPRODUTIVO
+        return {"category": category.value, "confidence": round(max(p, 1.0 - p), 4)}
+
+    @classmethod
+    def train(
+        cls,
+        samples: list[tuple[list[str], int]],
+        n_features: int = LOCAL_CLASSIFIER_FEATURES,
+        epochs: int = 10,
+        learning_rate: float = 0.5,
+        l2: float = 1e-6,
+        seed: int = 42,
+    ) -> "LocalClassifier":
+        weights = np.zeros(n_features, dtype=np.float32)
+        grad_sq = np.full(n_features, 1e-8, dtype=np.float32)
+        bias, bias_grad_sq = 0.0, 1e-8
+        features = [(featurize(tokens, n_features), label) for tokens, label in samples]
+        order = list(range(len(features)))
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(order)
+            for i in order:
+                (indexes, values), label = features[i]
+                z = float(weights[indexes] @ values) + bias if indexes.size else bias
+                p = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+                g = p - label
+                if indexes.size:
+                    grad = g * values + l2 * weights[indexes]
+                    grad_sq[indexes] += grad * grad
+                    weights[indexes] -= learning_rate * grad / np.sqrt(grad_sq[indexes])
+                bias_grad_sq += g * g
+                bias -= learning_rate * g / math.sqrt(bias_grad_sq)
+        return cls(weights, bias, {"trained_at": datetime.now(timezone.utc).isoformat(), "samples": len(samples)})
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.tmp.npz")
+        np.savez_compressed(
+            tmp_path,
+            weights=self.weights,
+            bias=np.array([self.bias], dtype=np.float64),
+            metadata=np.array(json.dumps(self.metadata)),
+        )
+        # troca atômica: workers que recarregam nunca veem um arquivo parcial
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "LocalClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["weights"].astype(np.float32),
+                float(data["bias"][0]),
+                json.loads(str(data["metadata"])),
+            )
+
+
+def evaluate(model: LocalClassifier, samples: list[tuple[list[str], int]], threshold: float = LOCAL_CLASSIFIER_THRESHOLD) -> Dict[str, Any]:
+    tp = fp = tn = fn = 0
+    confident = confident_correct = 0
+    for tokens, label in samples:
+        p = model.prob_produtivo(tokens)
+        predicted = 1 if p >= 0.5 else 0
+        if predicted == 1 and label == 1:
+            tp += 1
+        elif predicted == 1:
+            fp += 1
+        elif label == 0:
+            tn += 1
+        else:
+            fn += 1
+        if max(p, 1.0 - p) >= threshold:
+            confident += 1
+            confident_correct += int(predicted == label)
+    total = len(samples)
+    return {
+        "samples": total,
+        "accuracy": round((tp + tn) / total, 4) if total else None,
+        "precision_produtivo": round(tp / (tp + fp), 4) if tp + fp else None,
+        "recall_produtivo": round(tp / (tp + fn), 4) if tp + fn else None,
+        "threshold": threshold,
+        "coverage": round(confident / total, 4) if total else None,
+        "accuracy_when_confident": round(confident_correct / confident, 4) if confident else None,
+    }
+
+
+_lock = threading.Lock()
+_model: LocalClassifier | None = None
+_model_mtime: float | None = None
+_last_check = float("-inf")
+_stats = {"predictions": 0, "confident": 0, "uncertain": 0, "reloads": 0}
+
+
+def reload_model() -> LocalClassifier | None:
+    global _model, _model_mtime, _last_check
+    path = _model_path()
+    with _lock:
+        _last_check = time.monotonic()
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            _model, _model_mtime = None, None
+            return None
+        if mtime != _model_mtime:
+            try:
+                _model = LocalClassifier.load(path)
+                _model_mtime = mtime
+                _stats["reloads"] += 1
+            except Exception:
+                # mantém o modelo anterior se o arquivo novo estiver corrompido
+                pass
+        return _model
+
+
+def get_model() -> LocalClassifier | None:
+    if time.monotonic() - _last_check >= LOCAL_CLASSIFIER_RELOAD_INTERVAL_SECONDS:
+        return reload_model()
+    return _model
+
+
+def classify(tokens: list[str]) -> Dict[str, Any] | None:
+    """Classificação local; retorna None quando não há modelo ou a confiança fica abaixo do limiar."""
+    if not LOCAL_CLASSIFIER_ENABLED or not tokens:
+        return None
+    model = get_model()
+    if model is None:
+        return None
+    result = model.predict(tokens)
+    with _lock:
+        _stats["predictions"] += 1
+        if result["confidence"] >= LOCAL_CLASSIFIER_THRESHOLD:
+            _stats["confident"] += 1
+        else:
+            _stats["uncertain"] += 1
+    return result if result["confidence"] >= LOCAL_CLASSIFIER_THRESHOLD else None
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        data = dict(_stats)
+        data["model_loaded"] = _model is not None
+        data["model_metadata"] = dict(_model.metadata) if _model is not None else None
+    data["threshold"] = LOCAL_CLASSIFIER_THRESHOLD
+    return data
+
+
+def _label(category: str | None) -> int | None:
+    if category == Category.PRODUTIVO.value:
+        return 1
+    if category == Category.IMPRODUTIVO.value:
+        return 0
+    return None
+
+
+async def _load_db_samples(limit: int | None) -> list[tuple[int, list[str], int]]:
+    from sqlmodel import select
+
+    from app.db import async_session
+    from app.models import ClassifiedBy, Status, TextEntry
+
+    # só rótulos do LLM: treinar com as próprias previsões reforçaria os erros do modelo; registros anteriores à
+    # coluna `classified_by` (NULL) têm origem desconhecida e também ficam de fora
+    stmt = (
+        select(TextEntry.id, TextEntry.original_text, TextEntry.category)
+        .where(TextEntry.status == Status.COMPLETED.value)
+        .where(TextEntry.classified_by == ClassifiedBy.LLM.value)
+        .where(TextEntry.category.in_([Category.PRODUTIVO.value, Category.IMPRODUTIVO.value]))
+        .order_by(TextEntry.id.desc())
+    )
+    if limit:
+        stmt = stmt.limit(limit)
+    async with async_session() as session:
+        rows = (await session.execute(stmt)).all()
+    return [(row[0], preprocess_sync(row[1] or "")["tokens"], _label(row[2])) for row in rows]
+
+
+def _load_dir_samples(directory: Path) -> Iterable[tuple[int, list[str], int]]:
+    from app.services.read_file import read_file_sync
+
+    for i, path in enumerate(sorted(directory.iterdir())):
+        name = path.name.lower()
+        label = 0 if name.startswith("unproductive") else 1 if name.startswith("productive") else None
+        if label is None:
+            continue
+        yield i, preprocess_sync(read_file_sync(str(path)))["tokens"], label
+
+
+def _split(samples: list[tuple[int, list[str], int]], holdout: float):
+    # divisão determinística pelo id para que train/evaluate usem o mesmo holdout
+    train, test = [], []
+    for sample_id, tokens, label in samples:
+        if label is None:
+            continue
+        bucket = zlib.crc32(str(sample_id).encode("utf-8")) % 100
+        (test if bucket < holdout * 100 else train).append((tokens, label))
+    return train, test
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Treina/avalia o classificador local (PRODUTIVO/IMPRODUTIVO).")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--from-dir", type=Path, default=None, help="diretório com arquivos productive_*/unproductive_*")
+    parser.add_argument("--limit", type=int, default=None, help="máximo de TextEntry lidos do banco")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--output", type=Path, default=_model_path())
+    args = parser.parse_args(argv)
+
+    if args.from_dir is not None:
+        samples = list(_load_dir_samples(args.from_dir))
+    else:
+        samples = asyncio.run(_load_db_samples(args.limit))
+    train, test = _split(samples, args.holdout)
+
+    if args.command == "train":
+        if not train:
+            raise SystemExit("Nenhuma amostra rotulada para treino")
+        model = LocalClassifier.train(train, epochs=args.epochs)
+        model.metadata["holdout_metrics"] = evaluate(model, test) if test else None
+        model.save(args.output)
+        print(json.dumps({"output": str(args.output), **model.metadata}, ensure_ascii=False, indent=2))
+    else:
+        if not test:
+            # métricas no conjunto de treino superestimariam acurácia e cobertura
+            raise SystemExit("Holdout vazio: sem amostras para avaliar (aumente --holdout ou o número de amostras)")
+        model = LocalClassifier.load(args.output)
+        print(json.dumps(evaluate(model, test), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
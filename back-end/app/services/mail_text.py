@@ -0,0 +1,121 @@
+import os
+import re
+import tempfile
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesFeedParser
+from html.parser import HTMLParser
+
+from app.core.constants import MAIL_MAX_PDF_ATTACHMENTS, PDF_MAX_CHARS, UPLOAD_CHUNK_SIZE
+from app.services import pdf_text
+
+_SKIP_TAGS = {"script", "style", "head", "title", "noscript", "template"}
+_BLOCK_TAGS = {"br", "p", "div", "tr", "li", "ul", "ol", "table", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "hr", "section", "article"}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Texto visível do HTML (sem scripts, estilos e tags), uma linha por bloco."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    lines = (re.sub(r"[ \t\r\f\v\xa0]+", " ", line).strip() for line in "".join(parser.parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def parse_message(path: str) -> EmailMessage:
+    # alimenta o parser em blocos em vez de carregar o .eml inteiro numa string
+    parser = BytesFeedParser(policy=policy.default)
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            parser.feed(chunk)
+    return parser.close()
+
+
+def _body_text(message: EmailMessage) -> str:
+    body = message.get_body(preferencelist=("plain", "html"))
+    if body is None:
+        return ""
+    try:
+        content = body.get_content()
+    except (LookupError, UnicodeError):
+        content = body.get_payload(decode=True).decode("utf-8", errors="replace")
+    return html_to_text(content) if body.get_content_subtype() == "html" else content.strip()
+
+
+def _is_pdf(part: EmailMessage) -> bool:
+    filename = (part.get_filename() or "").lower()
+    return part.get_content_type() == "application/pdf" or filename.endswith(".pdf")
+
+
+def _pdf_attachment_text(part: EmailMessage, max_chars: int) -> str:
+    payload = part.get_payload(decode=True)
+    if not payload:
+        return ""
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        return pdf_text.extract_text(tmp_path, max_chars=max_chars)
+    except Exception:
+        # anexo corrompido não impede a leitura do corpo
+        return ""
+    finally:
+        os.unlink(tmp_path)
+
+
+def message_text(message: EmailMessage, max_chars: int = PDF_MAX_CHARS, max_pdf_attachments: int = MAIL_MAX_PDF_ATTACHMENTS) -> str:
+    """Assunto e corpo do e-mail; anexos são ignorados, exceto até `max_pdf_attachments` PDFs (texto extraído)."""
+    sections = []
+    subject = message.get("subject")
+    if subject:
+        sections.append(f"Assunto: {subject}")
+    body = _body_text(message)
+    if body:
+        sections.append(body)
+
+    remaining = max_chars - sum(len(s) for s in sections) if max_chars else 0
+    read_pdfs = 0
+    for part in message.iter_attachments():
+        if read_pdfs >= max_pdf_attachments or (max_chars and remaining <= 0):
+            break
+        if not _is_pdf(part):
+            continue
+        text = _pdf_attachment_text(part, remaining)
+        read_pdfs += 1
+        if text:
+            sections.append(f"[Anexo: {part.get_filename() or 'documento.pdf'}]\n{text}")
+            remaining -= len(text)
+
+    text = "\n\n".join(sections)
+    return text[:max_chars] if max_chars else text
+
+
+def extract_eml(path: str) -> str:
+    return message_text(parse_message(path))
@@ -1,24 +1,26 @@
 import os
 import asyncio
+import string
 from concurrent.futures import ProcessPoolExecutor
-from typing import Dict
+from typing import Dict, List
 from app.core.constants import NLP_WORKERS
 
 _nlp = None
 
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+STOPWORDS = {'e', 'o', 'a', 'de', 'do', 'da', 'em', 'um', 'uma', 'para', 'com', 'não', 'na', 'no', 'que', 'se', 'por', 'mais', 'as', 'os', 'é', 'são', 'foi', 'foram'}
+
+def tokenize(text: str) -> List[str]:
+    """Tokens usados em todo o pipeline (sem pontuação, minúsculos, sem stopwords e palavras curtas)."""
+    tokens = text.translate(_PUNCTUATION_TABLE).lower().split()
+    return [token for token in tokens if token not in STOPWORDS and len(token) > 2]
+
 def _preprocess_sync(text: str, top_n: int = 15) -> Dict:
     if not isinstance(text, str):
         raise TypeError("text must be a str")
     
     try:
-        import string
-        
-        text_clean = text.translate(str.maketrans('', '', string.punctuation)).lower()
-        
-        tokens = text_clean.split()
-        
-        stopwords = {'e', 'o', 'a', 'de', 'do', 'da', 'em', 'um', 'uma', 'para', 'com', 'não', 'na', 'no', 'que', 'se', 'por', 'mais', 'as', 'os', 'é', 'são', 'foi', 'foram'}
-        filtered_tokens = [token for token in tokens if token not in stopwords and len(token) > 2]
+        filtered_tokens = tokenize(text)
         
         from collections import Counter
         token_counts = Counter(filtered_tokens)
@@ -0,0 +1,161 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Iterator
+
+from app.core.constants import PDF_BACKEND, PDF_MAX_CHARS, PDF_PAGES_PER_TASK, PDF_PARALLEL_MIN_PAGES, PDF_WORKERS
+
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
+
+
+def _pdfium_pages(path: str, start: int, stop: int | None) -> Iterator[str]:
+    pdf = pdfium.PdfDocument(path)
+    try:
+        end = len(pdf) if stop is None else min(stop, len(pdf))
+        for index in range(start, end):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_bounded()
+            finally:
+                textpage.close()
+                page.close()
+            yield text.replace("\r\n", "\n")
+    finally:
+        pdf.close()
+
+
+def _pdfplumber_pages(path: str, start: int, stop: int | None) -> Iterator[str]:
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[start:stop]:
+            text = page.extract_text() or ""
+            # libera o cache de layout da página antes de seguir para a próxima
+            page.close()
+            yield text
+
+
+def iter_pages(path: str, start: int = 0, stop: int | None = None, backend: str = PDF_BACKEND) -> Iterator[str]:
+    """Texto de cada página de [start, stop), uma por vez.
+
+    Usa o pdfium quando disponível; se ele falhar, o pdfplumber continua a partir da página em que parou.
+    """
+    if backend == "pdfium" and pdfium is not None:
+        index = start
+        try:
+            for text in _pdfium_pages(path, start, stop):
+                yield text
+                index += 1
+            return
+        except Exception:
+            start = index
+    yield from _pdfplumber_pages(path, start, stop)
+
+
+def page_count(path: str, backend: str = PDF_BACKEND) -> int:
+    if backend == "pdfium" and pdfium is not None:
+        try:
+            pdf = pdfium.PdfDocument(path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+        except Exception:
+            pass
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_range(path: str, start: int, stop: int, backend: str) -> str:
+    # executado nos processos do pool
+    return "\n".join(iter_pages(path, start, stop, backend))
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn: o worker tem threads (loop persistente, write-behind), e fork com threads não é seguro
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _parallel_pages(path: str, n_pages: int, backend: str) -> Iterator[str]:
+    """Texto por faixa de páginas, em ordem; só ~2 faixas por processo ficam em andamento para que parar cedo
+    não extraia o documento inteiro à toa."""
+    step = max(1, PDF_PAGES_PER_TASK)
+    ranges = iter([(start, min(start + step, n_pages)) for start in range(0, n_pages, step)])
+    pool = _get_pool()
+    pending = deque(pool.submit(_extract_range, path, start, stop, backend) for start, stop in islice(ranges, PDF_WORKERS * 2))
+
+    def _gen() -> Iterator[str]:
+        try:
+            while pending:
+                text = pending.popleft().result()
+                for start, stop in islice(ranges, 1):
+                    pending.append(pool.submit(_extract_range, path, start, stop, backend))
+                yield text
+        finally:
+            for future in pending:
+                future.cancel()
+
+    return _gen()
+
+
+def _available_cpus() -> int:
+    # respeita a afinidade do processo (containers com CPUs limitadas)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _collect(parts: Iterator[str], max_chars: int) -> str:
+    collected: list[str] = []
+    total = 0
+    for text in parts:
+        collected.append(text)
+        total += len(text) + 1
+        if max_chars and total >= max_chars:
+            break
+    if hasattr(parts, "close"):
+        parts.close()
+    text = "\n".join(collected)
+    return text[:max_chars] if max_chars else text
+
+
+def extract_text(path: str, max_chars: int = PDF_MAX_CHARS, backend: str = PDF_BACKEND) -> str:
+    """Texto do PDF até `max_chars` (0 = tudo). Documentos grandes são extraídos em paralelo por faixas de páginas."""
+    # com um único núcleo o pool só adiciona custo (IPC e reabertura do documento por faixa)
+    if PDF_WORKERS > 1 and _available_cpus() > 1:
+        n_pages = page_count(path, backend)
+        if n_pages >= PDF_PARALLEL_MIN_PAGES:
+            try:
+                return _collect(_parallel_pages(path, n_pages, backend), max_chars)
+            except (BrokenProcessPool, OSError, AssertionError):
+                # pool indisponível (ex.: processo daemon sem permissão para criar filhos): extrai em sequência
+                _reset_pool()
+    return _collect(iter_pages(path, backend=backend), max_chars)
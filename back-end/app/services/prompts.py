@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.core.constants import PROMPT_DIR, PROMPT_RELOAD_INTERVAL_SECONDS, PROMPT_VERSION
+
+DEFAULT_PROMPT_DIR = Path(__file__).resolve().parents[1] / "prompts"
+
+
+def _render_examples(examples: list[dict]) -> str:
+    ex_texts: list[str] = []
+    for ex in examples:
+        ex_lines = [
+            f"EMAIL: {ex.get('email','')}",
+            f"CATEGORIA: {ex.get('category','')}",
+            f"RAZAO: {ex.get('reason','')}",
+            f"RESPOSTA_SUGERIDA: {ex.get('suggested_response','')}",
+        ]
+        ex_texts.append("\n".join(ex_lines))
+    return "\n\n".join(ex_texts)
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """Prompt versionado: prefixo estático (instruções + exemplos) renderizado uma vez, só a parte final varia."""
+
+    version: str
+    static_prefix: str
+    username_line: str
+    single_task: str
+    text_header: str
+    packed_task: str
+    packed_item: str
+    draft_task: str = ""
+    classify_task: str = ""
+    fingerprint: str = ""
+    source_mtime: float | None = field(default=None, compare=False)
+
+    @classmethod
+    def from_dict(cls, data: dict, source_mtime: float | None = None) -> "PromptTemplate":
+        prefix_parts = [data.get("instructions", ""), _render_examples(data.get("examples", []))]
+        return cls(
+            version=str(data["version"]),
+            static_prefix="\n\n".join([p for p in prefix_parts if p]),
+            username_line=data.get("username_line", ""),
+            single_task=data.get("single_task", ""),
+            text_header=data.get("text_header", ""),
+            packed_task=data.get("packed_task", ""),
+            packed_item=data.get("packed_item", "{text}"),
+            draft_task=data.get("draft_task", ""),
+            classify_task=data.get("classify_task", ""),
+            fingerprint=hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest(),
+            source_mtime=source_mtime,
+        )
+
+    @property
+    def cache_id(self) -> str:
+        return f"{self.version}:{self.fingerprint[:12]}"
+
+    def _username_part(self, username: str | None) -> str:
+        return self.username_line.format(username=username) if username and self.username_line else ""
+
+    def dynamic_part(self, text: str, username: str | None = None) -> str:
+        parts = [self._username_part(username), self.single_task, self.text_header, text]
+        return "\n\n".join([p for p in parts if p])
+
+    def packed_dynamic_part(self, texts: list[str], username: str | None = None) -> str:
+        emails = "\n\n".join(
+            self.packed_item.format(index=i, text=text) for i, text in enumerate(texts, start=1)
+        )
+        parts = [self._username_part(username), self.packed_task.format(count=len(texts)), emails]
+        return "\n\n".join([p for p in parts if p])
+
+    def draft_dynamic_part(self, text: str, category: str, username: str | None = None) -> str:
+        parts = [self._username_part(username), self.draft_task.format(category=category.upper()), self.text_header, text]
+        return "\n\n".join([p for p in parts if p])
+
+    def classify_dynamic_part(self, text: str) -> str:
+        parts = [self.classify_task, self.text_header, text]
+        return "\n\n".join([p for p in parts if p])
+
+    def render(self, text: str, username: str | None = None) -> str:
+        return f"{self.static_prefix}\n\n{self.dynamic_part(text, username)}"
+
+    def render_packed(self, texts: list[str], username: str | None = None) -> str:
+        return f"{self.static_prefix}\n\n{self.packed_dynamic_part(texts, username)}"
+
+    def render_classify(self, text: str) -> str:
+        return f"{self.static_prefix}\n\n{self.classify_dynamic_part(text)}"
+
+    def render_draft(self, text: str, category: str, username: str | None = None) -> str:
+        return f"{self.static_prefix}\n\n{self.draft_dynamic_part(text, category, username)}"
+
+
+def _template_path(version: str) -> Path:
+    base = Path(PROMPT_DIR) if PROMPT_DIR else DEFAULT_PROMPT_DIR
+    return base / f"{version}.json"
+
+
+def load_template(version: str = PROMPT_VERSION) -> PromptTemplate:
+    path = _template_path(version)
+    if not path.exists():
+        raise FileNotFoundError(f"Prompt template not found: {path}")
+    with path.open("r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    data.setdefault("version", version)
+    return PromptTemplate.from_dict(data, source_mtime=path.stat().st_mtime)
+
+
+_lock = threading.Lock()
+_current: PromptTemplate = load_template()
+_last_check = time.monotonic()
+
+
+def get_template() -> PromptTemplate:
+    """Template ativo; o arquivo é reconsultado no máximo a cada PROMPT_RELOAD_INTERVAL_SECONDS."""
+    global _current, _last_check
+    if PROMPT_RELOAD_INTERVAL_SECONDS <= 0:
+        return _current
+    now = time.monotonic()
+    if now - _last_check < PROMPT_RELOAD_INTERVAL_SECONDS:
+        return _current
+    with _lock:
+        _last_check = now
+        try:
+            mtime = os.stat(_template_path(PROMPT_VERSION)).st_mtime
+            if mtime != _current.source_mtime:
+                _current = load_template()
+        except Exception:
+            # mantém o template em uso se o arquivo estiver ausente ou inválido
+            pass
+    return _current
+
+
+def reload_template() -> PromptTemplate:
+    global _current, _last_check
+    with _lock:
+        _current = load_template()
+        _last_check = time.monotonic()
+    return _current
@@ -1,20 +1,116 @@
 import os
-import pdfplumber
 import asyncio
+import zipfile
+from typing import Callable, Dict
+from xml.etree import ElementTree
 
-def read_file_sync(path: str, encoding: str = "utf-8") -> str:
+from app.core.constants import PDF_MAX_CHARS
+from app.services import mail_text, pdf_text
+
+try:
+    import extract_msg
+except Exception:
+    extract_msg = None
+
+Reader = Callable[[str, str], str]
+
+# leitores por extensão; o tipo MIME do upload é usado quando o arquivo não tem extensão conhecida
+READERS: Dict[str, Reader] = {}
+MIME_TYPES: Dict[str, str] = {}
+
+
+def register_reader(extensions: tuple[str, ...], mime_types: tuple[str, ...] = ()):
+    def _register(reader: Reader) -> Reader:
+        for ext in extensions:
+            READERS[ext] = reader
+        for mime in mime_types:
+            MIME_TYPES[mime] = extensions[0]
+        return reader
+    return _register
+
+
+@register_reader((".txt",), ("text/plain",))
+def _read_text(path: str, encoding: str) -> str:
+    with open(path, "r", encoding=encoding) as f:
+        return f.read()
+
+
+@register_reader((".pdf",), ("application/pdf",))
+def _read_pdf(path: str, encoding: str) -> str:
+    return pdf_text.extract_text(path)
+
+
+@register_reader((".eml",), ("message/rfc822",))
+def _read_eml(path: str, encoding: str) -> str:
+    return mail_text.extract_eml(path)
+
+
+@register_reader((".html", ".htm"), ("text/html",))
+def _read_html(path: str, encoding: str) -> str:
+    with open(path, "r", encoding=encoding, errors="replace") as f:
+        return mail_text.html_to_text(f.read())
+
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+@register_reader((".docx",), ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",))
+def _read_docx(path: str, encoding: str) -> str:
+    paragraphs: list[str] = []
+    current: list[str] = []
+    total = 0
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as document:
+        # iterparse descarta cada parágrafo depois de lido, sem montar a árvore do documento inteiro
+        for _, element in ElementTree.iterparse(document):
+            if element.tag == f"{_W_NS}t" and element.text:
+                current.append(element.text)
+            elif element.tag == f"{_W_NS}tab":
+                current.append("\t")
+            elif element.tag == f"{_W_NS}p":
+                paragraph = "".join(current).strip()
+                current = []
+                element.clear()
+                if paragraph:
+                    paragraphs.append(paragraph)
+                    total += len(paragraph) + 1
+                    if PDF_MAX_CHARS and total >= PDF_MAX_CHARS:
+                        break
+    text = "\n".join(paragraphs)
+    return text[:PDF_MAX_CHARS] if PDF_MAX_CHARS else text
+
+
+@register_reader((".msg",), ("application/vnd.ms-outlook",))
+def _read_msg(path: str, encoding: str) -> str:
+    # formato binário do Outlook (OLE), lido pelo extract-msg (requirements.txt)
+    if extract_msg is None:
+        raise ValueError("leitura de .msg requer o pacote extract-msg (requirements.txt)")
+    message = extract_msg.openMsg(path)
+    try:
+        sections = [f"Assunto: {message.subject}"] if message.subject else []
+        body = message.body
+        if not body and message.htmlBody:
+            html = message.htmlBody
+            body = mail_text.html_to_text(html.decode("utf-8", errors="replace") if isinstance(html, bytes) else html)
+        if body:
+            sections.append(body.strip())
+        text = "\n\n".join(sections)
+    finally:
+        message.close()
+    return text[:PDF_MAX_CHARS] if PDF_MAX_CHARS else text
+
+
+def get_reader(path: str, content_type: str | None = None) -> Reader:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS and content_type:
+        ext = MIME_TYPES.get(content_type.split(";")[0].strip().lower(), ext)
+    return READERS.get(ext, _read_text)
+
+
+def read_file_sync(path: str, encoding: str = "utf-8", content_type: str | None = None) -> str:
     if not os.path.exists(path):
         raise FileNotFoundError(path)
 
-    if path.lower().endswith(".pdf"):
-        parts = []
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                parts.append(page.extract_text() or "")
-        return "\n".join(parts)
-    else:
-        with open(path, "r", encoding=encoding) as f:
-            return f.read()
-
-async def read_file_async(path: str, encoding: str = "utf-8") -> str:
-    return await asyncio.to_thread(read_file_sync, path, encoding)
+    return get_reader(path, content_type)(path, encoding)
+
+async def read_file_async(path: str, encoding: str = "utf-8", content_type: str | None = None) -> str:
+    return await asyncio.to_thread(read_file_sync, path, encoding, content_type)
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Dict
+
+from app.core.constants import REDIS_URL, STREAM_ENABLED, STREAM_TTL_SECONDS
+
+STREAM_PREFIX = "autou:stream"
+TERMINAL_EVENTS = ("done", "error")
+
+# seq monotônico por stream (INCR), mesmo quando pipeline e redação rodam em tasks diferentes;
+# o evento vai para a lista de replay e para o canal pub/sub numa única ida ao Redis
+_PUBLISH_SCRIPT = """
+local seq = redis.call('INCR', KEYS[2])
+local payload = '{"seq":' .. seq .. ',' .. string.sub(ARGV[1], 2)
+redis.call('RPUSH', KEYS[1], payload)
+redis.call('PUBLISH', KEYS[3], payload)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return seq
+"""
+
+
+def _keys(stream_id: str) -> tuple[str, str, str]:
+    base = f"{STREAM_PREFIX}:{stream_id}"
+    return f"{base}:buf", f"{base}:seq", base
+
+
+def _redis_client():
+    import redis.asyncio as redis_asyncio
+
+    return redis_asyncio.from_url(REDIS_URL, socket_connect_timeout=0.5)
+
+
+class ChunkRelay:
+    """Repassa chunks do LLM para o Redis (pub/sub + lista de replay) sem bloquear a geração.
+
+    `relay(texto)` pode ser chamado do event loop ou de uma thread do executor; uma task interna
+    agrupa os eventos pendentes e os publica em pipeline. Falhas no Redis não interrompem o pipeline.
+    """
+
+    def __init__(self, stream_id: str):
+        self.stream_id = stream_id
+        self._queue: asyncio.Queue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._pump: asyncio.Task | None = None
+        self.published = 0
+        self.failed = False
+
+    async def start(self) -> "ChunkRelay":
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._queue = asyncio.Queue()
+        self._pump = asyncio.create_task(self._run())
+        return self
+
+    def emit(self, event_type: str, **data: Any) -> None:
+        if self._queue is None:
+            return
+        event = {"type": event_type, "ts": time.time(), **data}
+        if threading.get_ident() == self._loop_thread:
+            self._queue.put_nowait(event)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    def __call__(self, text: str) -> None:
+        if text:
+            self.emit("chunk", text=text)
+
+    def reset(self) -> None:
+        # chunks já enviados deixam de valer (a geração recomeça do zero)
+        self.emit("reset")
+
+    async def close(self) -> None:
+        if self._pump is None:
+            return
+        self._queue.put_nowait(None)
+        await self._pump
+        self._pump = None
+        self._queue = None
+
+    async def __aenter__(self) -> "ChunkRelay":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _run(self) -> None:
+        client = None
+        script = None
+        buf_key, seq_key, channel = _keys(self.stream_id)
+        closing = False
+        while not closing:
+            event = await self._queue.get()
+            batch = []
+            while event is not None:
+                batch.append(event)
+                if self._queue.empty():
+                    break
+                event = self._queue.get_nowait()
+            closing = event is None
+            if not batch or self.failed:
+                continue
+            try:
+                if client is None:
+                    client = _redis_client()
+                    script = client.register_script(_PUBLISH_SCRIPT)
+                pipe = client.pipeline(transaction=False)
+                for ev in batch:
+                    payload = json.dumps(ev, ensure_ascii=False)
+                    await script(keys=[buf_key, seq_key, channel], args=[payload, STREAM_TTL_SECONDS], client=pipe)
+                await pipe.execute()
+                self.published += len(batch)
+            except Exception:
+                # streaming é best-effort: o resultado final continua sendo gravado no banco
+                self.failed = True
+        if client is not None:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+
+async def open_relay(stream_id: str | None) -> ChunkRelay | None:
+    if not STREAM_ENABLED or not stream_id:
+        return None
+    return await ChunkRelay(stream_id).start()
+
+
+async def subscribe(stream_id: str, timeout: float, after: int = 0) -> AsyncIterator[Dict[str, Any]]:
+    """Eventos do stream a partir de `after`: primeiro o histórico da lista, depois o pub/sub ao vivo.
+
+    Termina no primeiro evento `done`/`error` ou, sem eventos novos, após `timeout` segundos
+    (emitindo `{"type": "timeout"}`).
+    """
+    buf_key, _, channel = _keys(stream_id)
+    client = _redis_client()
+    pubsub = client.pubsub()
+    try:
+        # inscreve antes de ler o histórico para não perder eventos entre as duas leituras
+        await pubsub.subscribe(channel)
+        last = after
+        for raw in await client.lrange(buf_key, 0, -1):
+            event = json.loads(raw)
+            if event["seq"] <= last:
+                continue
+            last = event["seq"]
+            yield event
+            if event["type"] in TERMINAL_EVENTS:
+                return
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                yield {"seq": last, "type": "timeout"}
+                return
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(remaining, 1.0))
+            if message is None:
+                continue
+            event = json.loads(message["data"])
+            if event["seq"] <= last:
+                continue
+            last = event["seq"]
+            deadline = time.monotonic() + timeout
+            yield event
+            if event["type"] in TERMINAL_EVENTS:
+                return
+    finally:
+        try:
+            await pubsub.aclose()
+            await client.aclose()
+        except Exception:
+            pass
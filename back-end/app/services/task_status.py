@@ -0,0 +1,133 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+from app.core.constants import REDIS_URL, TASK_STATUS_POLL_INTERVAL_SECONDS, TASK_STATUS_TTL_SECONDS
+from app.models import Status
+
+TASK_PREFIX = "autou:task"
+QUEUED = "queued"
+TERMINAL_STATUSES = (Status.COMPLETED.value, Status.FAILED.value)
+
+_redis = None
+_redis_loop = None
+
+
+def status_key(task_id: str) -> str:
+    return f"{TASK_PREFIX}:{task_id}"
+
+
+def _get_redis():
+    global _redis, _redis_loop
+    loop = asyncio.get_running_loop()
+    if _redis is None or _redis_loop is not loop:
+        import redis.asyncio as redis_asyncio
+
+        _redis = redis_asyncio.from_url(REDIS_URL, socket_connect_timeout=0.5, socket_timeout=2.0, decode_responses=True)
+        _redis_loop = loop
+    return _redis
+
+
+async def record(task_id: str | None, **fields: Any) -> None:
+    """Atualiza o hash compacto de status da task (best-effort; o banco continua sendo a fonte final)."""
+    if not task_id:
+        return
+    mapping = {k: "" if v is None else str(v) for k, v in fields.items()}
+    mapping["updated_at"] = str(time.time())
+    try:
+        client = _get_redis()
+        pipe = client.pipeline(transaction=False)
+        pipe.hset(status_key(task_id), mapping=mapping)
+        pipe.expire(status_key(task_id), TASK_STATUS_TTL_SECONDS)
+        await pipe.execute()
+    except Exception:
+        pass
+
+
+def _decode(raw: Dict[str, str]) -> Dict[str, Any]:
+    def _int(value):
+        return int(value) if value not in (None, "") else None
+
+    def _float(value):
+        return float(value) if value not in (None, "") else None
+
+    return {
+        "status": raw.get("status") or QUEUED,
+        "user_id": _int(raw.get("user_id")),
+        "text_entry_id": _int(raw.get("text_entry_id")),
+        "category": raw.get("category") or None,
+        "confidence": _float(raw.get("confidence")),
+        "generated_response": raw.get("generated_response") or None,
+    }
+
+
+def _from_result_backend(task_id: str) -> Dict[str, Any] | None:
+    # fallback quando o hash expirou ou o Redis de status não estava disponível
+    from celery.result import AsyncResult
+
+    from app.services.celery import celery
+
+    res = AsyncResult(task_id, app=celery)
+    state = res.state
+    if state == "SUCCESS" and isinstance(res.result, dict):
+        data = res.result
+        return {
+            "status": data.get("status") or Status.COMPLETED.value,
+            "user_id": data.get("user_id"),
+            "text_entry_id": data.get("id"),
+            "category": data.get("category"),
+            "confidence": data.get("confidence"),
+            "generated_response": data.get("generated_response"),
+        }
+    if state == "FAILURE":
+        return {"status": Status.FAILED.value, "user_id": None, "text_entry_id": None, "category": None, "confidence": None, "generated_response": None}
+    # PENDING também é o estado de ids desconhecidos: sem hash não há como distinguir
+    return None
+
+
+async def get_many(task_ids: list[str]) -> Dict[str, Dict[str, Any] | None]:
+    found: Dict[str, Dict[str, Any] | None] = {task_id: None for task_id in task_ids}
+    try:
+        client = _get_redis()
+        pipe = client.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipe.hgetall(status_key(task_id))
+        for task_id, raw in zip(task_ids, await pipe.execute()):
+            if raw:
+                found[task_id] = _decode(raw)
+    except Exception:
+        pass
+
+    missing = [task_id for task_id, data in found.items() if data is None]
+    if missing:
+        try:
+            results = await asyncio.to_thread(lambda: [_from_result_backend(t) for t in missing])
+        except Exception:
+            results = [None] * len(missing)
+        found.update(zip(missing, results))
+    return found
+
+
+def _snapshot(data: Dict[str, Any] | None) -> tuple:
+    if data is None:
+        return (None,)
+    return (data["status"], data["category"], data["generated_response"] is not None)
+
+
+async def wait_many(task_ids: list[str], timeout: float) -> Dict[str, Dict[str, Any] | None]:
+    """Long-polling: retorna quando alguma task muda de estado, quando todas terminaram ou após `timeout`."""
+    current = await get_many(task_ids)
+    if timeout <= 0:
+        return current
+    initial = {task_id: _snapshot(data) for task_id, data in current.items()}
+    deadline = time.monotonic() + timeout
+    while True:
+        if all(data is not None and data["status"] in TERMINAL_STATUSES for data in current.values()):
+            return current
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return current
+        await asyncio.sleep(min(TASK_STATUS_POLL_INTERVAL_SECONDS, remaining))
+        current = await get_many(task_ids)
+        if any(_snapshot(data) != initial[task_id] for task_id, data in current.items()):
+            return current
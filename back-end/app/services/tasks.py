@@ -1,106 +1,377 @@
 from app.services.celery import celery
-from app.services.read_file import read_file_sync
+from app.services.read_file import read_file_async
 from app.services import nlp as nlp_service
 from app.services import ia as ia_service
-from app.models import Category, Status, User
+from app.services import local_classifier
+from app.services import excerpt
+from app.services import fairness, task_status, user_cache
+from app.services.stream import open_relay
+from app.services.write_behind import buffer as write_behind
+from app.services import async_runtime
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+import atexit
+from app.models import Category, ClassifiedBy, Status
 from app.schemas import TextEntryCreateRequest
-from app.db import async_session
-from app.crud import create_text_entry, update_text_entry_by_id, get_user_by_id
+from app.db import async_session, engine, reset_pool_after_fork
+from app.core.constants import BULK_MAX_DEFERRALS, IA_DRAFT_PRIORITY, IA_PACK_ENABLED, IA_SPLIT_PIPELINE, WORKER_PERSISTENT_LOOP, WRITE_BEHIND_ENABLED
+from app.crud import create_text_entry, update_text_entries, update_text_entries_status, update_text_entry_by_id
 from pathlib import Path
+import asyncio
 import os
 
 
-async def process_pipeline_async(file_path: str = None, text: str = None, user_id: int | None = None, username: str | None = None, top_n: int = 15):
+@worker_process_init.connect
+def _init_worker_process(**kwargs) -> None:
+    reset_pool_after_fork()
+    if WORKER_PERSISTENT_LOOP:
+        async_runtime.runtime.start()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _flush_write_behind_on_shutdown(**kwargs) -> None:
+    write_behind.close()
+    # fecha as conexões do pool no mesmo loop em que foram abertas
+    async_runtime.runtime.stop(engine.dispose())
+
+
+atexit.register(write_behind.close)
+
+
+def _enqueue_draft(text_entry_id: int, text: str, category: str, username: str | None, task_id: str | None = None) -> bool:
+    try:
+        draft_response_task.apply_async(
+            kwargs={"text_entry_id": text_entry_id, "text": text, "category": category, "username": username, "task_id": task_id},
+            priority=IA_DRAFT_PRIORITY,
+        )
+        return True
+    except Exception:
+        return False
+
+
+async def _run_ia(session, entry_id: int | None, nlp_res: dict, username: str | None, relay=None, task_id: str | None = None, persist_fields: dict | None = None) -> dict:
+    cleaned = nlp_res["cleaned_text"]
+    local_res = local_classifier.classify(nlp_res["tokens"])
+    if IA_SPLIT_PIPELINE and entry_id is not None:
+        # estágio 1: categoria barata (local ou LLM com poucos tokens), gravada de imediato
+        if local_res is not None:
+            class_res = {**local_res, "classified_by": ClassifiedBy.LOCAL.value}
+        else:
+            class_res = await ia_service.classify_async(cleaned)
+        category = class_res.get("category")
+        if category != Category.SEM_CLASSIFICACAO.value:
+            await update_text_entry_by_id(
+                entry_id, session=session, category=category, classified_by=class_res["classified_by"], **(persist_fields or {})
+            )
+            if relay is not None:
+                relay.emit("category", category=category, status=Status.PROCESSING.value)
+            # estágio 2: redação da resposta em fila de menor prioridade
+            if _enqueue_draft(entry_id, cleaned, category, username, task_id=task_id):
+                return {**class_res, "deferred": True}
+            with ia_service.stream_chunks_to(relay):
+                draft = await ia_service.draft_async(cleaned, category, username=username)
+            return {**class_res, "generated_response": draft}
+    elif local_res is not None:
+        # categoria decidida localmente; o LLM só redige a resposta
+        with ia_service.stream_chunks_to(relay):
+            draft = await ia_service.draft_async(cleaned, local_res["category"], username=username)
+        return {**local_res, "generated_response": draft, "classified_by": ClassifiedBy.LOCAL.value}
+    with ia_service.stream_chunks_to(relay):
+        return await ia_service.infer_async(cleaned, username=username)
+
+
+def _category_value(ia_cat) -> str:
+    if isinstance(ia_cat, Category):
+        return ia_cat.value
+    if isinstance(ia_cat, str):
+        try:
+            return Category(ia_cat).value
+        except Exception:
+            low = ia_cat.strip().lower()
+            if low.startswith("prod"):
+                return Category.PRODUTIVO.value
+            if low.startswith("improd") or low.startswith("im"):
+                return Category.IMPRODUTIVO.value
+    return Category.SEM_CLASSIFICACAO.value
+
+
+async def process_pipeline_async(file_path: str = None, text: str = None, user_id: int | None = None, username: str | None = None, top_n: int = 15, text_entry_id: int | None = None, ia_res: dict | None = None, task_id: str | None = None, pending_updates: list[dict] | None = None, file_size: int | None = None, file_content_type: str | None = None, content_hash: str | None = None):
+    """Pipeline de um e-mail com uma única sessão: INSERT ... RETURNING (se preciso) e um UPDATE final.
+
+    Com `pending_updates`, o UPDATE final é acumulado na lista para o chamador gravar em lote.
+    """
 
     if not file_path and not text:
         raise ValueError("file_path ou text obrigatório")
 
-    content_text = read_file_sync(file_path) if file_path else text
+    relay = await open_relay(task_id)
+    if relay is not None:
+        relay.emit("start", user_id=user_id)
+    await task_status.record(task_id, status=Status.PROCESSING.value, user_id=user_id)
+
+    # a sessão só segura conexão durante cada transação curta, nunca durante a chamada ao LLM
+    async with async_session() as session:
+
+        async def _save(entry_id: int, **fields) -> None:
+            if pending_updates is not None:
+                pending_updates.append({"id": entry_id, **fields})
+            elif WRITE_BEHIND_ENABLED:
+                # espera a gravação em lote: o resultado só é publicado (status, evento "done") depois de durável
+                await write_behind.write(entry_id, **fields)
+            else:
+                await update_text_entry_by_id(entry_id, session=session, **fields)
+
+        # registro já criado em lote pela API quando text_entry_id vem preenchido
+        entry_id = text_entry_id
 
-    created = None
-    if user_id is not None:
         try:
-            te_req = TextEntryCreateRequest(
-                user_id=user_id,
-                original_text=content_text,
-                file_name=os.path.basename(file_path) if file_path else None,
-            )
-            created = await create_text_entry(te_req)
+            # leitura (PDF) fora do loop: no modo async outras pipelines seguem rodando
+            content_text = text if text is not None else await read_file_async(file_path, content_type=file_content_type)
         except Exception:
-            created = None
+            if entry_id is not None:
+                try:
+                    await _save(entry_id, status=Status.FAILED.value)
+                except Exception:
+                    pass
+            if relay is not None:
+                relay.emit("error", status=Status.FAILED.value)
+                await relay.close()
+            await task_status.record(task_id, status=Status.FAILED.value)
+            raise
 
-    try:
-        nlp_res = nlp_service.preprocess_sync(content_text, top_n=top_n)
-        username = None
-        if user_id is not None:
+        if entry_id is None and user_id is not None:
             try:
-                async with async_session() as s:
-                    ux = await get_user_by_id(s, user_id)
-                    username = getattr(ux, "username", None) if ux else None
+                te_req = TextEntryCreateRequest(
+                    user_id=user_id,
+                    original_text=content_text,
+                    file_name=os.path.basename(file_path) if file_path else None,
+                    file_size=file_size,
+                    file_content_type=file_content_type,
+                    content_hash=content_hash,
+                )
+                entry_id = await create_text_entry(te_req, session=session)
             except Exception:
-                username = None
-            ia_res = await ia_service.infer_async(nlp_res["cleaned_text"], username=username)
-
-        ia_cat = ia_res.get("category")
-        category_enum = None
-        if isinstance(ia_cat, Category):
-            category_enum = ia_cat
-        elif isinstance(ia_cat, str):
-            try:
-                category_enum = Category(ia_cat)
-            except Exception:
-                low = ia_cat.strip().lower()
-                if low.startswith("prod"):
-                    category_enum = Category.PRODUTIVO
-                elif low.startswith("improd") or low.startswith("im"):
-                    category_enum = Category.IMPRODUTIVO
-                else:
-                    category_enum = Category.SEM_CLASSIFICACAO
-        else:
-            category_enum = Category.SEM_CLASSIFICACAO
-
-        final_generated = ia_res.get("generated_response") or ia_res.get("raw_response_clean") or ia_res.get("raw_response") or ""
-
-        result = {
-            "id": created.id if created else None,
-            "user_id": user_id,
-            "original_text": content_text,
-            "category": category_enum.value,
-            "generated_response": final_generated,
-            "status": Status.COMPLETED.value,
-            "file_name": os.path.basename(file_path) if file_path else None,
-            "created_at": None,
-            "nlp": nlp_res if isinstance(nlp_res, dict) else None,
-        }
-
-        if created is not None:
+                entry_id = None
+
+        # arquivos de lote chegam sem texto no registro criado pela API
+        extra_fields = {"original_text": content_text} if text_entry_id is not None and file_path else {}
+
+        try:
+            nlp_res = nlp_service.preprocess_sync(content_text, top_n=top_n)
+            # o LLM recebe no máximo IA_INPUT_TOKEN_BUDGET tokens, qualquer que seja o tamanho do documento
+            nlp_res = excerpt.fit_budget(content_text, nlp_res)
+            if ia_res is None:
+                if username is None and user_id is not None:
+                    # a API já envia o username; só tarefas antigas na fila caem aqui
+                    try:
+                        identity = await user_cache.get_identity(user_id)
+                        username = identity.username if identity else None
+                    except Exception:
+                        username = None
+                # devolve a conexão ao pool antes de esperar o LLM
+                await session.close()
+                ia_res = await _run_ia(session, entry_id, nlp_res, username, relay=relay, task_id=task_id, persist_fields=extra_fields)
+                if ia_res.get("deferred"):
+                    # categoria já gravada; a resposta chega depois via draft_response_task
+                    await task_status.record(task_id, text_entry_id=entry_id, category=ia_res["category"], confidence=ia_res.get("confidence"))
+                    return {
+                        "id": entry_id,
+                        "user_id": user_id,
+                        "original_text": content_text,
+                        "category": ia_res["category"],
+                        "generated_response": None,
+                        "status": Status.PROCESSING.value,
+                        "file_name": os.path.basename(file_path) if file_path else None,
+                        "created_at": None,
+                        "nlp": nlp_res if isinstance(nlp_res, dict) else None,
+                        "truncated": nlp_res.get("truncated", False),
+                    }
+
+            category_value = _category_value(ia_res.get("category"))
+            final_generated = ia_res.get("generated_response") or ia_res.get("raw_response_clean") or ia_res.get("raw_response") or ""
+
+            result = {
+                "id": entry_id,
+                "user_id": user_id,
+                "original_text": content_text,
+                "category": category_value,
+                "generated_response": final_generated,
+                "status": Status.COMPLETED.value,
+                "file_name": os.path.basename(file_path) if file_path else None,
+                "created_at": None,
+                "nlp": nlp_res if isinstance(nlp_res, dict) else None,
+                "truncated": nlp_res.get("truncated", False),
+            }
+
+            if entry_id is not None:
+                # falha ao gravar cai no caminho de erro: o resultado não é anunciado sem estar no banco
+                db_update_kwargs = {"generated_response": final_generated, "status": Status.COMPLETED.value, **extra_fields}
+                if category_value != Category.SEM_CLASSIFICACAO.value:
+                    db_update_kwargs["category"] = category_value
+                    db_update_kwargs["classified_by"] = ia_res.get("classified_by") or ClassifiedBy.LLM.value
+                await _save(entry_id, **db_update_kwargs)
+            if relay is not None:
+                relay.emit("done", id=result["id"], category=result["category"], generated_response=final_generated, status=result["status"], truncated=result["truncated"])
+            await task_status.record(
+                task_id,
+                status=result["status"],
+                text_entry_id=result["id"],
+                category=result["category"],
+                confidence=ia_res.get("confidence"),
+                generated_response=final_generated,
+            )
+            return result
+        except Exception as e:
+            if entry_id is not None:
+                try:
+                    await _save(entry_id, status=Status.FAILED.value)
+                except Exception:
+                    pass
+            if relay is not None:
+                relay.emit("error", status=Status.FAILED.value)
+            await task_status.record(task_id, status=Status.FAILED.value)
+            raise e
+        finally:
+            if relay is not None:
+                await relay.close()
             try:
-                db_update_kwargs = {"generated_response": final_generated, "status": Status.COMPLETED.value}
-                if category_enum != Category.SEM_CLASSIFICACAO:
-                    db_update_kwargs["category"] = category_enum.value
-                await update_text_entry_by_id(created.id, **db_update_kwargs)
+                if file_path and Path(file_path).exists():
+                    Path(file_path).unlink()
             except Exception:
                 pass
+
+
+@celery.task(bind=True, name="process_pipeline_task")
+def process_pipeline_task(self, file_path: str = None, text: str = None, user_id: int | None = None, username: str | None = None, top_n: int = 15, file_size: int | None = None, file_content_type: str | None = None, content_hash: str | None = None):
+    if not file_path and not text:
+        raise ValueError("file_path ou text obrigatório")
+
+    return async_runtime.run(process_pipeline_async(file_path=file_path, text=text, user_id=user_id, username=username, top_n=top_n, task_id=self.request.id, file_size=file_size, file_content_type=file_content_type, content_hash=content_hash))
+
+
+async def draft_response_async(text_entry_id: int, text: str, category: str, username: str | None = None, task_id: str | None = None) -> dict:
+    relay = await open_relay(task_id)
+    try:
+        with ia_service.stream_chunks_to(relay):
+            draft = await ia_service.draft_async(text, category, username=username)
+        if WRITE_BEHIND_ENABLED:
+            await write_behind.write(text_entry_id, generated_response=draft, status=Status.COMPLETED.value)
+        else:
+            await update_text_entry_by_id(text_entry_id, generated_response=draft, status=Status.COMPLETED.value)
+        result = {"id": text_entry_id, "category": category, "generated_response": draft, "status": Status.COMPLETED.value}
+        if relay is not None:
+            relay.emit("done", **result)
+        await task_status.record(task_id, status=Status.COMPLETED.value, generated_response=draft)
         return result
-    except Exception as e:
-        if created is not None:
+    except Exception:
+        try:
+            if WRITE_BEHIND_ENABLED:
+                await write_behind.write(text_entry_id, status=Status.FAILED.value)
+            else:
+                await update_text_entry_by_id(text_entry_id, status=Status.FAILED.value)
+        except Exception:
+            pass
+        if relay is not None:
+            relay.emit("error", status=Status.FAILED.value)
+        await task_status.record(task_id, status=Status.FAILED.value)
+        raise
+    finally:
+        if relay is not None:
+            await relay.close()
+
+
+@celery.task(bind=True, name="draft_response_task")
+def draft_response_task(self, text_entry_id: int, text: str, category: str, username: str | None = None, task_id: str | None = None):
+    return async_runtime.run(draft_response_async(text_entry_id, text, category, username=username, task_id=task_id))
+
+
+async def _packed_infer_batch(items: list[dict], top_n: int = 15) -> None:
+    by_username: dict[str | None, list[tuple[dict, str]]] = {}
+    for item in items:
+        if item.get("text") is None and item.get("file_path"):
             try:
-                async with async_session() as s:
-                    await update_text_entry_by_id(created.id, status=Status.FAILED.value)
+                item["text"] = await read_file_async(item["file_path"], content_type=item.get("file_content_type"))
             except Exception:
-                pass
-        raise e
-    finally:
+                # o pipeline individual tenta de novo e marca o registro como FAILED
+                continue
+        if not item.get("text"):
+            continue
+        nlp_res = excerpt.fit_budget(item["text"], nlp_service.preprocess_sync(item["text"], top_n=top_n))
+        if local_classifier.classify(nlp_res["tokens"]) is not None:
+            # o pipeline individual usa o classificador local e pede só a resposta ao LLM
+            continue
+        by_username.setdefault(item.get("username"), []).append((item, nlp_res["cleaned_text"]))
+
+    for username, entries in by_username.items():
         try:
-            if file_path and Path(file_path).exists():
-                Path(file_path).unlink()
+            results = await ia_service.infer_packed_async([cleaned for _, cleaned in entries], username=username)
+        except Exception:
+            continue
+        for (item, _), result in zip(entries, results):
+            if result is not None:
+                item["ia_res"] = result
+
+
+async def _save_batch_updates(pending_updates: list[dict]) -> set[int]:
+    """Grava os UPDATEs finais do bloco; retorna os ids que não foram gravados (marcados como FAILED)."""
+    try:
+        await update_text_entries(pending_updates)
+        return set()
+    except Exception:
+        pass
+    # o executemany falhou inteiro: uma linha por vez, para não deixar o bloco todo em Processando
+    unsaved: set[int] = set()
+    for row in pending_updates:
+        fields = {key: value for key, value in row.items() if key != "id"}
+        try:
+            await update_text_entry_by_id(row["id"], **fields)
+        except Exception:
+            unsaved.add(row["id"])
+    if unsaved:
+        try:
+            await update_text_entries_status(list(unsaved), Status.FAILED)
         except Exception:
             pass
+    return unsaved
 
 
-@celery.task(bind=True, name="process_pipeline_task")
-def process_pipeline_task(self, file_path: str = None, text: str = None, user_id: int | None = None, username: str | None = None, top_n: int = 15):
-    if not file_path and not text:
-        raise ValueError("file_path ou text obrigatório")
+async def process_batch_async(items: list[dict], top_n: int = 15) -> list[dict]:
+    items = [dict(item) for item in items]
+    if IA_PACK_ENABLED and len(items) > 1:
+        await _packed_infer_batch(items, top_n=top_n)
+
+    # sem write-behind, os UPDATEs finais de todo o bloco vão em um executemany só
+    pending_updates: list[dict] | None = None if WRITE_BEHIND_ENABLED else []
+    results = await asyncio.gather(
+        *(process_pipeline_async(top_n=top_n, pending_updates=pending_updates, **item) for item in items),
+        return_exceptions=True,
+    )
+    unsaved = await _save_batch_updates(pending_updates) if pending_updates else set()
+    summary = []
+    for item, res in zip(items, results):
+        if isinstance(res, BaseException):
+            summary.append({"id": item.get("text_entry_id"), "status": Status.FAILED.value, "error": str(res)})
+        elif res.get("id") in unsaved:
+            summary.append({"id": res.get("id"), "status": Status.FAILED.value, "error": "falha ao gravar o resultado"})
+        else:
+            summary.append({"id": res.get("id"), "status": res.get("status"), "category": res.get("category")})
+    return summary
 
-    return __import__("asyncio").run(process_pipeline_async(file_path=file_path, text=text, user_id=user_id, username=username, top_n=top_n))
\ No newline at end of file
+
+@celery.task(bind=True, name="process_batch_task", max_retries=None)
+def process_batch_task(self, items: list[dict], top_n: int = 15):
+    if not items:
+        return []
+
+    # justiça entre usuários na fila bulk: com outros usuários esperando e sem tokens, o bloco é adiado. O retry
+    # é republicado com ETA e fica retido por um worker até vencer (não volta para o fim da fila), por isso o
+    # número de adiamentos é limitado e o prazo tem jitter
+    user_id = items[0].get("user_id")
+    if self.request.retries < BULK_MAX_DEFERRALS:
+        wait = async_runtime.run(fairness.acquire(user_id, cost=len(items)))
+        if wait > 0:
+            raise self.retry(countdown=fairness.backoff(wait))
+    try:
+        return async_runtime.run(process_batch_async(items, top_n=top_n))
+    finally:
+        async_runtime.run(fairness.mark_done(user_id))
\ No newline at end of file
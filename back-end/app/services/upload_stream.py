@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.constants import UPLOAD_CHUNK_SIZE
+
+# campos de texto do formulário (ex.: corpo do e-mail), mesmo limite por parte do parser do Starlette
+MAX_FIELD_BYTES = 1024 * 1024
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass(frozen=True)
+class SavedUpload:
+    path: Path
+    size: int
+    content_type: str | None
+    sha256: str
+
+
+@dataclass
+class StreamedForm:
+    fields: Dict[str, List[str]] = field(default_factory=dict)
+    files: Dict[str, List[SavedUpload]] = field(default_factory=dict)
+
+    def first_field(self, name: str) -> str | None:
+        values = self.fields.get(name)
+        return values[0] if values else None
+
+    def first_file(self, name: str) -> SavedUpload | None:
+        values = self.files.get(name)
+        return values[0] if values else None
+
+    def discard(self) -> None:
+        for uploads in self.files.values():
+            for upload in uploads:
+                upload.path.unlink(missing_ok=True)
+
+
+def reject_oversized(content_length: str | None, max_bytes: int) -> None:
+    """Recusa pelo Content-Length, antes de ler qualquer byte do corpo."""
+    try:
+        declared = int(content_length) if content_length else None
+    except ValueError:
+        raise UploadRejected(400, "Content-Length inválido")
+    if declared is not None and declared > max_bytes:
+        raise UploadRejected(413, f"Requisição excede o máximo de {max_bytes} bytes")
+
+
+class _FileSink:
+    def __init__(self, field_name: str, filename: str, path: Path, content_type: str | None):
+        self.field_name = field_name
+        self.filename = filename
+        self.path = path
+        self.content_type = content_type
+        self.size = 0
+        self.pending = bytearray()
+        self.digest = hashlib.sha256()
+        self._file = None
+
+    def write(self) -> None:
+        # roda numa thread: grava o bloco acumulado e atualiza o hash no mesmo passo
+        if self._file is None:
+            self._file = self.path.open("wb")
+        data, self.pending = bytes(self.pending), bytearray()
+        self.digest.update(data)
+        self._file.write(data)
+
+    def finish(self) -> SavedUpload:
+        self.write()
+        self.close()
+        return SavedUpload(path=self.path, size=self.size, content_type=self.content_type, sha256=self.digest.hexdigest())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _FormParser:
+    def __init__(self, target_dir: Path, file_field: str, max_file_bytes: int, max_files: int):
+        self.target_dir = target_dir
+        self.file_field = file_field
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.form = StreamedForm()
+        self.sinks: List[_FileSink] = []
+        self.finished: List[_FileSink] = []
+        self._header_name = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._field_name = ""
+        self._field_data = bytearray()
+        self._sink: _FileSink | None = None
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._field_data = bytearray()
+        self._sink = None
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise UploadRejected(400, 'Parte do multipart sem "name" no Content-Disposition')
+        self._field_name = options[b"name"].decode("utf-8", errors="replace")
+        if b"filename" not in options:
+            return
+        if self._field_name != self.file_field:
+            raise UploadRejected(400, f"Arquivos só são aceitos no campo '{self.file_field}'")
+        if len(self.sinks) >= self.max_files:
+            raise UploadRejected(413, f"Máximo de {self.max_files} arquivos por requisição")
+        filename = options[b"filename"].decode("utf-8", errors="replace")
+        suffix = os.path.splitext(filename)[1]
+        content_type = self._headers.get(b"content-type")
+        self._sink = _FileSink(
+            self._field_name,
+            filename,
+            self.target_dir / f"upload-{uuid.uuid4().hex}{suffix}",
+            content_type.decode("latin-1") if content_type else None,
+        )
+        self.sinks.append(self._sink)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._sink is None:
+            if len(self._field_data) + end - start > MAX_FIELD_BYTES:
+                raise UploadRejected(413, f"Campo '{self._field_name}' excede {MAX_FIELD_BYTES} bytes")
+            self._field_data += data[start:end]
+            return
+        self._sink.size += end - start
+        if self._sink.size > self.max_file_bytes:
+            raise UploadRejected(413, f"Arquivo excede o máximo de {self.max_file_bytes} bytes")
+        self._sink.pending += data[start:end]
+
+    def on_part_end(self) -> None:
+        if self._sink is None:
+            self.form.fields.setdefault(self._field_name, []).append(self._field_data.decode("utf-8", errors="replace"))
+        else:
+            self.finished.append(self._sink)
+            self._sink = None
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+def _discard(sinks: List[_FileSink]) -> None:
+    for sink in sinks:
+        sink.close()
+        sink.path.unlink(missing_ok=True)
+
+
+async def read_form(request, target_dir: Path, file_field: str, max_file_bytes: int, max_files: int) -> StreamedForm:
+    """Lê o formulário direto de `request.stream()`.
+
+    Arquivos vão para `target_dir` conforme chegam (em blocos de UPLOAD_CHUNK_SIZE, gravados numa thread), com
+    SHA-256 e tamanho calculados no caminho; a leitura para no primeiro byte acima de `max_file_bytes`. Sem
+    spool intermediário do Starlette: cada byte é gravado uma única vez.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type == b"application/x-www-form-urlencoded":
+        # só campos de texto (sem arquivos)
+        form = await request.form()
+        fields: Dict[str, List[str]] = {}
+        for key, value in form.multi_items():
+            fields.setdefault(key, []).append(value)
+        return StreamedForm(fields=fields)
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadRejected(415, "Enviar multipart/form-data")
+
+    state = _FormParser(target_dir, file_field, max_file_bytes, max_files)
+    parser = MultipartParser(params[b"boundary"], state.callbacks())
+    completed = 0
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for sink in state.finished:
+                upload = await asyncio.to_thread(sink.finish)
+                completed += 1
+                if not sink.filename and not upload.size:
+                    # campo de arquivo vazio (navegador sem arquivo escolhido)
+                    upload.path.unlink(missing_ok=True)
+                    continue
+                state.form.files.setdefault(sink.field_name, []).append(upload)
+            state.finished.clear()
+            for sink in state.sinks:
+                if len(sink.pending) >= UPLOAD_CHUNK_SIZE:
+                    await asyncio.to_thread(sink.write)
+        parser.finalize()
+        if completed != len(state.sinks):
+            raise UploadRejected(400, "Multipart incompleto")
+    except BaseException:
+        # inclui desconexão do cliente no meio do envio
+        await asyncio.to_thread(_discard, state.sinks)
+        raise
+    return state.form
@@ -0,0 +1,72 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.constants import (
+    REDIS_URL,
+    USER_CACHE_ENABLED,
+    USER_CACHE_MAX_ITEMS,
+    USER_CACHE_SYNC_INTERVAL_MS,
+    USER_CACHE_TTL_SECONDS,
+    USER_CACHE_USE_REDIS,
+)
+from app.services.cache import TwoTierCache
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Identidade mínima do usuário autenticado (sem hash de senha nem histórico)."""
+
+    id: int
+    username: str
+    email: str
+
+
+_USER_CACHE = TwoTierCache(
+    "user:identity",
+    max_items=USER_CACHE_MAX_ITEMS,
+    ttl_seconds=USER_CACHE_TTL_SECONDS,
+    redis_url=REDIS_URL if USER_CACHE_USE_REDIS else None,
+    invalidation_url=REDIS_URL if USER_CACHE_SYNC_INTERVAL_MS > 0 else None,
+    sync_interval_seconds=USER_CACHE_SYNC_INTERVAL_MS / 1000,
+)
+
+
+def _key(user_id: int) -> str:
+    return str(user_id)
+
+
+async def get_identity(user_id: int, session: AsyncSession | None = None) -> CachedUser | None:
+    """Identidade do usuário; sem `session`, a consulta usa uma sessão própria, fechada logo em seguida."""
+    if USER_CACHE_ENABLED:
+        cached = await _USER_CACHE.get(_key(user_id))
+        if cached is not None:
+            return CachedUser(**cached)
+
+    from app.crud import get_user_by_id
+
+    if session is None:
+        from app.db import async_session
+
+        async with async_session() as own_session:
+            user = await get_user_by_id(own_session, user_id)
+    else:
+        user = await get_user_by_id(session, user_id)
+    if user is None:
+        return None
+    identity = CachedUser(id=user.id, username=user.username, email=user.email)
+    if USER_CACHE_ENABLED:
+        await _USER_CACHE.set(_key(user_id), asdict(identity))
+    return identity
+
+
+async def invalidate(user_id: int) -> None:
+    # outros processos descartam o LRU local em até USER_CACHE_SYNC_INTERVAL_MS (ou USER_CACHE_TTL_SECONDS, se 0)
+    await _USER_CACHE.delete(_key(user_id))
+
+
+def stats() -> Dict[str, Any]:
+    data = _USER_CACHE.stats()
+    data["enabled"] = USER_CACHE_ENABLED
+    return data
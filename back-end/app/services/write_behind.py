@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple
+
+from app.core.constants import WRITE_BEHIND_ENABLED, WRITE_BEHIND_FLUSH_MS, WRITE_BEHIND_MAX_ROWS
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Acumula atualizações de TextEntry no worker e grava em lote.
+
+    Atualizações do mesmo id são mescladas (a mais recente vence). A gravação roda numa thread com engine
+    síncrono, independente dos event loops criados por task. A thread grava a cada N ms ou ao juntar N linhas;
+    `write()` espera a gravação que leva a sua linha (group commit).
+    """
+
+    def __init__(self, flush_interval_ms: int, max_rows: int):
+        self.flush_interval = max(1, flush_interval_ms) / 1000
+        self.max_rows = max(1, max_rows)
+        self._init_state()
+
+    def _init_state(self) -> None:
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._waiters: List[Tuple[int, Future]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._engine = None
+        self._stats = {"added": 0, "coalesced": 0, "flushes": 0, "rows_written": 0, "failures": 0}
+
+    def _get_engine(self):
+        if self._engine is None:
+            from app.db import create_sync_engine
+
+            self._engine = create_sync_engine()
+        return self._engine
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="textentry-write-behind", daemon=True)
+                self._thread.start()
+
+    def _merge(self, entry_id: int, fields: Dict[str, Any]) -> bool:
+        # chamado com self._lock; retorna se o buffer encheu
+        pending = self._rows.get(entry_id)
+        if pending is None:
+            self._rows[entry_id] = dict(fields)
+        else:
+            pending.update(fields)
+            self._stats["coalesced"] += 1
+        self._stats["added"] += 1
+        return len(self._rows) >= self.max_rows
+
+    def submit(self, entry_id: int, **fields: Any) -> Future:
+        """Enfileira a linha e retorna um Future resolvido quando ela estiver gravada no banco."""
+        future: Future = Future()
+        with self._lock:
+            full = self._merge(entry_id, fields)
+            self._waiters.append((entry_id, future))
+        self._ensure_thread()
+        if full:
+            # buffer cheio: grava sem esperar o fim da janela
+            self._wake.set()
+        return future
+
+    async def write(self, entry_id: int, **fields: Any) -> None:
+        await asyncio.wrap_future(self.submit(entry_id, **fields))
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, {}
+                waiters, self._waiters = self._waiters, []
+            if not rows:
+                for _, future in waiters:
+                    future.set_result(0)
+                return 0
+            from app.crud import flush_text_entry_updates_sync
+
+            try:
+                written = flush_text_entry_updates_sync(self._get_engine(), rows)
+            except Exception as exc:
+                awaited = {entry_id for entry_id, _ in waiters}
+                with self._lock:
+                    # devolve ao buffer sem sobrescrever atualizações mais novas do mesmo id; linhas com alguém
+                    # esperando ficam com quem esperava (a task trata a falha e não publica o resultado)
+                    for entry_id, fields in rows.items():
+                        if entry_id not in awaited:
+                            self._rows[entry_id] = {**fields, **self._rows.get(entry_id, {})}
+                    self._stats["failures"] += 1
+                for _, future in waiters:
+                    future.set_exception(exc)
+                raise
+            with self._lock:
+                self._stats["flushes"] += 1
+                self._stats["rows_written"] += written
+            for _, future in waiters:
+                future.set_result(written)
+            return written
+
+    async def aflush(self) -> int:
+        return await asyncio.to_thread(self.flush)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("write-behind flush failed; rows kept for the next attempt")
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self.flush()
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+    def _after_fork(self) -> None:
+        # thread, locks e conexões do processo pai não existem no filho
+        self._init_state()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._rows)
+            stats["waiting"] = len(self._waiters)
+        stats["enabled"] = WRITE_BEHIND_ENABLED
+        return stats
+
+
+buffer = WriteBehindBuffer(WRITE_BEHIND_FLUSH_MS, WRITE_BEHIND_MAX_ROWS)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=buffer._after_fork)
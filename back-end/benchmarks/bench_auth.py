@@ -0,0 +1,81 @@
+"""Latência de uma requisição autenticada em função do tamanho do histórico do usuário.
+
+Uso (a partir de back-end/):
+
+    python -m benchmarks.bench_auth --sizes 0 1000 10000 --requests 200
+
+Por padrão usa um SQLite temporário; defina DATABASE_URL para medir contra o Postgres.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+if not os.getenv("DATABASE_URL"):
+    _tmp_db = Path(tempfile.mkdtemp()) / "bench_auth.db"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp_db}"
+
+
+async def _seed(n_texts: int) -> int:
+    from app.crud import create_text_entries_bulk, create_user
+    from app.db import async_session
+    from app.models import User
+    from app.schemas import TextEntryCreateRequest
+
+    async with async_session() as session:
+        user = await create_user(session, User(username=f"bench-{n_texts}", email=f"bench-{n_texts}-{time.time_ns()}@example.com", hash_password="x"))
+    body = "Prezados, segue o relatório mensal com os números consolidados. " * 20
+    for start in range(0, n_texts, 1000):
+        reqs = [TextEntryCreateRequest(user_id=user.id, original_text=body) for _ in range(min(1000, n_texts - start))]
+        await create_text_entries_bulk(reqs)
+    return user.id
+
+
+async def _measure(client, token: str, n_requests: int, path: str) -> list[float]:
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        resp = await client.get(path, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        resp.raise_for_status()
+    return latencies
+
+
+async def main(sizes: list[int], n_requests: int) -> None:
+    import logging
+
+    import httpx
+
+    from app.db import engine, init_db
+    from app.main import app
+    from app.services.auth_service import create_access_token
+
+    engine.echo = False
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    await init_db()
+
+    transport = httpx.ASGITransport(app=app)
+    print(f"{'textos':>8} {'rota':<32} {'p50 ms':>8} {'p95 ms':>8}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for n_texts in sizes:
+            user_id = await _seed(n_texts)
+            token = create_access_token({"sub": str(user_id)})
+            # include_texts=true reproduz o carregamento antigo (selectinload do histórico) para comparação
+            for path in ("/users/me", "/texts/historico?limit=20", "/users/me?include_texts=true"):
+                await _measure(client, token, 5, path)
+                latencies = sorted(await _measure(client, token, n_requests, path))
+                p95 = latencies[int(len(latencies) * 0.95) - 1]
+                print(f"{n_texts:>8} {path:<32} {statistics.median(latencies):>8.2f} {p95:>8.2f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.requests))
@@ -0,0 +1,83 @@
+"""Extração de texto de PDF: pdfplumber (antigo) x pdfium sequencial x motor de `app/services/pdf_text.py`.
+
+Uso (a partir de back-end/):
+
+    python -m benchmarks.bench_pdf_extract --repeat 20 --synthetic-pages 400
+
+Mede os PDFs de exemplo em `data/` e um documento sintético montado com as páginas deles repetidas
+(`--synthetic-pages`), no qual entram a extração em paralelo por faixas de páginas e a parada antecipada
+(`PDF_MAX_CHARS`).
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+
+def _timed(fn, repeat: int) -> tuple[float, int]:
+    latencies = []
+    chars = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chars = len(fn())
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), chars
+
+
+def _build_synthetic(samples: list[Path], n_pages: int, target: Path) -> None:
+    import pypdfium2 as pdfium
+
+    dest = pdfium.PdfDocument.new()
+    sources = [pdfium.PdfDocument(str(p)) for p in samples]
+    while len(dest) < n_pages:
+        for src in sources:
+            if len(dest) >= n_pages:
+                break
+            dest.import_pages(src)
+    dest.save(str(target))
+    dest.close()
+    for src in sources:
+        src.close()
+
+
+def main(repeat: int, synthetic_pages: int) -> None:
+    from app.core.constants import PDF_MAX_CHARS, PDF_WORKERS
+    from app.services import pdf_text
+
+    def modes(path: str):
+        return (
+            ("pdfplumber, documento inteiro", lambda: "\n".join(pdf_text.iter_pages(path, backend="pdfplumber"))),
+            ("pdfium, documento inteiro", lambda: "\n".join(pdf_text.iter_pages(path, backend="pdfium"))),
+            ("motor, documento inteiro", lambda: pdf_text.extract_text(path, max_chars=0)),
+            (f"motor, até {PDF_MAX_CHARS} caracteres", lambda: pdf_text.extract_text(path)),
+        )
+
+    samples = sorted(DATA_DIR.glob("*.pdf"))
+    print(f"{'arquivo':<22} {'modo':<34} {'p50 ms':>9} {'caracteres':>11}")
+    for sample in samples:
+        for label, fn in modes(str(sample)):
+            ms, chars = _timed(fn, repeat)
+            print(f"{sample.name:<22} {label:<34} {ms:>9.2f} {chars:>11}")
+
+    if synthetic_pages > 0 and samples:
+        with tempfile.TemporaryDirectory() as tmp:
+            synthetic = Path(tmp) / "synthetic.pdf"
+            _build_synthetic(samples, synthetic_pages, synthetic)
+            name = f"sintético {synthetic_pages} pág."
+            # aquece o pool de processos (spawn) antes de medir
+            pdf_text.extract_text(str(synthetic), max_chars=0)
+            for label, fn in modes(str(synthetic)):
+                ms, chars = _timed(fn, max(1, repeat // 4))
+                print(f"{name:<22} {label:<34} {ms:>9.2f} {chars:>11}")
+    print(f"\nPDF_WORKERS={PDF_WORKERS}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--synthetic-pages", type=int, default=400)
+    args = parser.parse_args()
+    main(args.repeat, args.synthetic_pages)
@@ -0,0 +1,118 @@
+"""Idas ao banco por e-mail em `process_pipeline_async` (LLM substituído por uma resposta fixa).
+
+Uso (a partir de back-end/):
+
+    python -m benchmarks.bench_pipeline_db --emails 50
+
+Conta comandos SQL e commits via eventos do engine (inclusive o engine síncrono do write-behind). Por padrão usa um SQLite temporário; defina DATABASE_URL
+para medir contra o Postgres.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+if not os.getenv("DATABASE_URL"):
+    _tmp_db = Path(tempfile.mkdtemp()) / "bench_pipeline_db.db"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp_db}"
+
+os.environ.setdefault("STREAM_ENABLED", "false")
+os.environ.setdefault("LOCAL_CLASSIFIER_ENABLED", "false")
+os.environ.setdefault("IA_CACHE_ENABLED", "false")
+
+EMAIL = "Olá, preciso do status do chamado 4821 aberto ontem sobre o acesso ao sistema financeiro. Obrigado."
+
+
+async def _fake_genai(prompt: str, cached_content: str | None = None, max_output_tokens: int | None = None) -> str:
+    if max_output_tokens:
+        return "PRODUTIVO\nCONFIDENCE: 0.9"
+    return "PRODUTIVO\nCONFIDENCE: 0.9\nRESPOSTA_SUGERIDA: Olá, estamos verificando o chamado."
+
+
+class _Counter:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+    def on_execute(self, *args, **kwargs):
+        self.statements += 1
+
+    def on_commit(self, *args, **kwargs):
+        self.commits += 1
+
+
+async def _run(n_emails: int, split: bool, batch: bool, write_behind: bool, user_id: int, counter: _Counter) -> dict:
+    from app.services import tasks
+
+    tasks.IA_SPLIT_PIPELINE = split
+    tasks.WRITE_BEHIND_ENABLED = write_behind
+    counter.statements = counter.commits = 0
+    start = time.perf_counter()
+    if batch:
+        from app.crud import create_text_entries_bulk
+        from app.schemas import TextEntryCreateRequest
+
+        ids = await create_text_entries_bulk([TextEntryCreateRequest(user_id=user_id, original_text=EMAIL) for _ in range(n_emails)])
+        items = [{"text_entry_id": i, "text": EMAIL, "user_id": user_id, "username": "bench"} for i in ids]
+        await tasks.process_batch_async(items)
+    else:
+        for _ in range(n_emails):
+            await tasks.process_pipeline_async(text=EMAIL, user_id=user_id, username="bench")
+    if write_behind:
+        await tasks.write_behind.aflush()
+    elapsed = time.perf_counter() - start
+    return {
+        "statements_per_email": counter.statements / n_emails,
+        "commits_per_email": counter.commits / n_emails,
+        "ms_per_email": elapsed * 1000 / n_emails,
+    }
+
+
+async def main(n_emails: int) -> None:
+    import logging
+
+    from sqlalchemy import event
+
+    from app.crud import create_user
+    from app.db import async_session, engine, init_db
+    from app.models import User
+    from app.services import ia, tasks
+
+    engine.echo = False
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    await init_db()
+    ia.call_genai = _fake_genai
+    # sem broker no benchmark: a resposta do estágio 2 é redigida no próprio pipeline
+    tasks._enqueue_draft = lambda *args, **kwargs: False
+
+    async with async_session() as session:
+        user = await create_user(session, User(username="bench", email=f"bench-{time.time_ns()}@example.com", hash_password="x"))
+
+    counter = _Counter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter.on_execute)
+    event.listen(engine.sync_engine, "commit", counter.on_commit)
+    sync_engine = tasks.write_behind._get_engine()
+    event.listen(sync_engine, "before_cursor_execute", counter.on_execute)
+    event.listen(sync_engine, "commit", counter.on_commit)
+
+    print(f"{'modo':<34} {'SQL/e-mail':>10} {'commits/e-mail':>15} {'ms/e-mail':>10}")
+    for label, split, batch, write_behind in (
+        ("individual, chamada única", False, False, False),
+        ("individual, dois estágios", True, False, False),
+        ("lote (process_batch_async)", False, True, False),
+        ("individual, write-behind", False, False, True),
+        ("lote, write-behind", False, True, True),
+    ):
+        stats = await _run(n_emails, split, batch, write_behind, user.id, counter)
+        print(f"{label:<34} {stats['statements_per_email']:>10.2f} {stats['commits_per_email']:>15.2f} {stats['ms_per_email']:>10.2f}")
+    tasks.write_behind.close()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.emails))
@@ -0,0 +1,84 @@
+"""Vazão de um processo do worker em função do número de pipelines simultâneas (modo `WORKER_MODE=async`).
+
+Uso (a partir de back-end/):
+
+    python -m benchmarks.bench_worker_concurrency --emails 200 --latency-ms 300 --in-flight 1 10 50 100
+
+Reproduz o pool `threads` do Celery: N threads chamam `async_runtime.run(process_pipeline_async(...))` sobre o mesmo
+loop persistente, limitado por um semáforo de N. O LLM é substituído por uma espera de `--latency-ms`; `1` equivale a
+um processo prefork. Por padrão usa um SQLite temporário; defina DATABASE_URL para medir contra o Postgres.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+if not os.getenv("DATABASE_URL"):
+    _tmp_db = Path(tempfile.mkdtemp()) / "bench_worker_concurrency.db"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp_db}"
+
+os.environ.setdefault("DB_ROLE", "worker")
+os.environ.setdefault("STREAM_ENABLED", "false")
+os.environ.setdefault("LOCAL_CLASSIFIER_ENABLED", "false")
+os.environ.setdefault("IA_CACHE_ENABLED", "false")
+os.environ.setdefault("IA_SPLIT_PIPELINE", "false")
+
+EMAIL = "Olá, preciso do status do chamado 4821 aberto ontem sobre o acesso ao sistema financeiro. Obrigado."
+
+
+def main(n_emails: int, latency_ms: int, in_flight_levels: list[int]) -> None:
+    import logging
+
+    from app.crud import create_user
+    from app.db import async_session, engine, init_db
+    from app.models import User
+    from app.services import ia, tasks
+    from app.services.async_runtime import AsyncRuntime
+
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+    async def _fake_genai(prompt: str, cached_content: str | None = None, max_output_tokens: int | None = None) -> str:
+        await asyncio.sleep(latency_ms / 1000)
+        return "PRODUTIVO\nCONFIDENCE: 0.9\nRESPOSTA_SUGERIDA: Olá, estamos verificando o chamado."
+
+    ia.call_genai = _fake_genai
+
+    async def _setup() -> int:
+        await init_db()
+        async with async_session() as session:
+            user = await create_user(session, User(username="bench", email=f"bench-{time.time_ns()}@example.com", hash_password="x"))
+        return user.id
+
+    print(f"{'pipelines simultâneas':>22} {'e-mails/s':>10} {'s total':>8} {'pico em voo':>12} {'RSS máx MB':>11}")
+    setup_runtime = AsyncRuntime()
+    user_id = setup_runtime.run(_setup())
+    setup_runtime.stop(engine.dispose())
+    for level in in_flight_levels:
+        runtime = AsyncRuntime(max_in_flight=level)
+
+        def _task(_) -> dict:
+            return runtime.run(tasks.process_pipeline_async(text=EMAIL, user_id=user_id, username="bench"))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            list(pool.map(_task, range(n_emails)))
+        elapsed = time.perf_counter() - start
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        peak = runtime.stats()["peak_in_flight"]
+        print(f"{level:>22} {n_emails / elapsed:>10.1f} {elapsed:>8.2f} {peak:>12} {rss_mb:>11.1f}")
+        # conexões ficam presas ao loop; cada nível usa um runtime novo
+        runtime.stop(engine.dispose())
+    tasks.write_behind.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--latency-ms", type=int, default=300)
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 10, 50, 100])
+    args = parser.parse_args()
+    main(args.emails, args.latency_ms, args.in_flight)
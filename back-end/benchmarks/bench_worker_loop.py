@@ -0,0 +1,86 @@
+"""Overhead por task no worker: `asyncio.run` por task versus o event loop persistente do processo.
+
+Uso (a partir de back-end/):
+
+    python -m benchmarks.bench_worker_loop --tasks 500
+
+Cada "task" abre uma sessão e executa um `SELECT 1`, como o início de `process_pipeline_async`. Com `asyncio.run`
+as conexões ficam presas ao loop que morre no fim da task, então o pool é descartado a cada execução (o que o
+asyncpg exige); no loop persistente a mesma conexão é reaproveitada. Por padrão usa um SQLite temporário; defina
+DATABASE_URL para medir contra o Postgres, onde o custo de abrir conexão pesa bem mais.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+if not os.getenv("DATABASE_URL"):
+    _tmp_db = Path(tempfile.mkdtemp()) / "bench_worker_loop.db"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp_db}"
+
+os.environ.setdefault("DB_ROLE", "worker")
+
+
+async def _empty() -> None:
+    return None
+
+
+async def _db_task() -> None:
+    from sqlalchemy import text
+
+    from app.db import async_session
+
+    async with async_session() as session:
+        await session.execute(text("SELECT 1"))
+
+
+async def _db_task_then_dispose() -> None:
+    from app.db import engine
+
+    try:
+        await _db_task()
+    finally:
+        await engine.dispose()
+
+
+def _measure(n_tasks: int, submit) -> list[float]:
+    latencies = []
+    for _ in range(n_tasks):
+        start = time.perf_counter()
+        submit()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main(n_tasks: int) -> None:
+    import logging
+
+    from app.db import engine
+    from app.services.async_runtime import AsyncRuntime
+
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    runtime = AsyncRuntime()
+
+    modes = (
+        ("asyncio.run, corrotina vazia", lambda: asyncio.run(_empty())),
+        ("loop persistente, corrotina vazia", lambda: runtime.run(_empty())),
+        ("asyncio.run, SELECT 1 + dispose", lambda: asyncio.run(_db_task_then_dispose())),
+        ("loop persistente, SELECT 1", lambda: runtime.run(_db_task())),
+    )
+    print(f"{'modo':<36} {'média ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, submit in modes:
+        submit()  # aquecimento (import, primeira conexão)
+        latencies = _measure(n_tasks, submit)
+        p95 = statistics.quantiles(latencies, n=20)[18]
+        print(f"{label:<36} {statistics.fmean(latencies):>9.3f} {statistics.median(latencies):>8.3f} {p95:>8.3f}")
+    runtime.stop(engine.dispose())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=500)
+    args = parser.parse_args()
+    main(args.tasks)
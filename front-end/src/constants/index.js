@@ -8,8 +8,15 @@ export const API_CONFIG = {
 export const FILE_LIMITS = {
   MAX_SIZE_BYTES: 10 * 1024 * 1024, // 10MB
   MAX_SIZE_MB: 10,
-  ALLOWED_TYPES: ["application/pdf", "text/plain"],
-  ALLOWED_EXTENSIONS: [".pdf", ".txt"],
+  ALLOWED_TYPES: [
+    "application/pdf",
+    "text/plain",
+    "message/rfc822",
+    "application/vnd.ms-outlook",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "text/html",
+  ],
+  ALLOWED_EXTENSIONS: [".pdf", ".txt", ".eml", ".msg", ".docx", ".html", ".htm"],
 };
 
 export const UI_CONFIG = {
@@ -27,7 +34,7 @@ export const STATUS = {
 
 export const ERROR_MESSAGES = {
   FILE_TOO_LARGE: `File too large. Maximum allowed: ${FILE_LIMITS.MAX_SIZE_MB}MB`,
-  INVALID_FILE_TYPE: "Only PDF and TXT files are allowed",
+  INVALID_FILE_TYPE: "Only PDF, TXT, EML, MSG, DOCX and HTML files are allowed",
   NETWORK_ERROR: "Network error. Check your internet connection.",
   TIMEOUT_ERROR: "Request timed out. Please try again.",
   GENERIC_ERROR: "An unexpected error occurred. Please try again.",
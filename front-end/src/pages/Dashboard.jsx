@@ -55,7 +55,12 @@ const Dashboard = () => {
   const handleFileChange = useCallback((e) => {
     const file = e.target.files[0];
     if (file) {
-      if (FILE_LIMITS.ALLOWED_TYPES.includes(file.type)) {
+      const name = file.name.toLowerCase();
+      // .eml/.msg costumam chegar sem tipo MIME no navegador
+      if (
+        FILE_LIMITS.ALLOWED_TYPES.includes(file.type) ||
+        FILE_LIMITS.ALLOWED_EXTENSIONS.some((ext) => name.endsWith(ext))
+      ) {
         setFormData((prev) => ({
           ...prev,
           file: file,
@@ -154,7 +159,7 @@ const Dashboard = () => {
                 htmlFor="fileInput"
                 className="block text-sm font-medium text-gray-300 mb-2"
               >
-                Archive Upload (PDF/TXT)
+                Archive Upload (PDF/TXT/EML/MSG/DOCX/HTML)
               </label>
               <div className="flex items-center space-x-4">
                 <input
@@ -162,7 +167,7 @@ const Dashboard = () => {
                   id="fileInput"
                   type="file"
                   onChange={handleFileChange}
-                  accept=".pdf,.txt"
+                  accept={FILE_LIMITS.ALLOWED_EXTENSIONS.join(",")}
                   disabled={!!formData.text.trim()}
                   className="block w-full text-sm text-gray-300 file:mr-4 file:py-2 file:px-4 file:rounded-full file:border-0 file:text-sm file:font-semibold file:bg-purple-50 file:text-purple-700 hover:file:bg-purple-100 disabled:opacity-50 disabled:cursor-not-allowed"
                 />
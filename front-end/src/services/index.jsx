@@ -46,9 +46,15 @@ export const textService = {
         formData.append("file", data.file);
       }
 
+      // mesma chave em reenvios desta requisição: o backend devolve a task já criada
+      const idempotencyKey =
+        globalThis.crypto?.randomUUID?.() ??
+        `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
       const response = await api.post("/texts/processar_email", formData, {
         headers: {
           "Content-Type": "multipart/form-data",
+          "Idempotency-Key": idempotencyKey,
         },
         timeout: API_CONFIG.UPLOAD_TIMEOUT,
       });